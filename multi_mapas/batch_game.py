@@ -0,0 +1,96 @@
+"""Várias cópias do Block Picker andando juntas com NumPy.
+
+Cada jogo do lote tem as mesmas regras de engine.Game (move_player + update),
+mas o estado fica em arrays de formato (N, ...) e uma chamada de step move
+todos os jogos de uma vez. Jogos que pegam a recompensa recomeçam sozinhos.
+"""
+import numpy as np  # pip install numpy
+from engine import DIRECTIONS, load_map
+
+
+# Ações na mesma ordem de DIRECTIONS; índices fora dessa faixa não movem (como
+# uma direção inválida em Game.move_player)
+ACTIONS = list(DIRECTIONS)
+_DELTAS = np.array([DIRECTIONS[a] for a in ACTIONS] + [(0, 0)], dtype=np.int64)
+
+
+class BatchGame:
+    def __init__(self, map_indices, seed=None):
+        """map_indices: índice em MAPS de cada jogo do lote (pode repetir)."""
+        self.map_idx = np.asarray(map_indices, dtype=np.int64)
+        self.n = len(self.map_idx)
+        self.rng = np.random.default_rng(seed)
+
+        # Um layout por mapa distinto, compartilhado pelas cópias daquele mapa
+        unique, self.layout_id = np.unique(self.map_idx, return_inverse=True)
+        self.layouts = [load_map(int(i)) for i in unique]
+        rows = max(layout.rows for layout in self.layouts)
+        cols = max(layout.cols for layout in self.layouts)
+        # Fora do layout conta como parede: bate com a checagem de limites do Game
+        self.map_walls = np.ones((len(self.layouts), rows, cols), dtype=bool)
+        self.start_pos = np.zeros((self.n, 2), dtype=np.int64)
+        # -1 quando o layout não tem 'R' e a recompensa é sorteada no reset
+        self.start_block = np.full((self.n, 2), -1, dtype=np.int64)
+        for k, layout in enumerate(self.layouts):
+            sel = self.layout_id == k
+            grid = np.frombuffer(layout.walls, dtype=np.uint8).reshape(layout.rows, layout.cols)
+            self.map_walls[k, :layout.rows, :layout.cols] = grid.astype(bool)
+            self.start_pos[sel] = layout.player_start or layout.free_cells.cell(0)
+            if layout.reward_start is not None:
+                self.start_block[sel] = layout.reward_start
+
+        self.player_pos = np.zeros((self.n, 2), dtype=np.int64)
+        self.block_pos = np.zeros((self.n, 2), dtype=np.int64)
+        # Total de recompensas de cada cópia desde a criação do lote (o Game
+        # zera score no reset; aqui ele continua somando entre episódios)
+        self.scores = np.zeros(self.n, dtype=np.int64)
+        self.reset()
+
+    @property
+    def walls(self):
+        """Máscara de paredes (N, rows, cols) de cada jogo (cópia; o step usa map_walls)."""
+        return self.map_walls[self.layout_id]
+
+    def reset(self, mask=None):
+        """Recomeça os jogos selecionados por mask (todos quando None)."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.player_pos[mask] = self.start_pos[mask]
+        self.block_pos[mask] = self.start_block[mask]
+        for i in np.nonzero(mask & (self.start_block[:, 0] < 0))[0]:
+            self.block_pos[i] = self._random_block(i)
+
+    def _random_block(self, i):
+        free = self.layouts[self.layout_id[i]].free_cells
+        k = free.rank([int(v) for v in self.player_pos[i]])
+        n = len(free) - (k is not None)
+        if n <= 0:
+            raise ValueError("Não há célula livre para colocar a recompensa.")
+        j = int(self.rng.integers(n))
+        if k is not None and j >= k:
+            j += 1
+        return free.cell(j)
+
+    def step(self, actions):
+        """Aplica uma ação por jogo e retorna (observação, recompensas, terminou).
+
+        actions: array (N,) com índices em ACTIONS. A observação é o par de
+        arrays (player_pos, block_pos), ambos (N, 2) em [x, y], já depois do
+        reset automático dos jogos que terminaram.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        actions = np.where((actions >= 0) & (actions < len(ACTIONS)), actions, len(ACTIONS))
+        new_pos = self.player_pos + _DELTAS[actions]
+        rows, cols = self.map_walls.shape[1:]
+        inside = (new_pos[:, 0] >= 0) & (new_pos[:, 0] < cols) & (new_pos[:, 1] >= 0) & (new_pos[:, 1] < rows)
+        x = np.clip(new_pos[:, 0], 0, cols - 1)
+        y = np.clip(new_pos[:, 1], 0, rows - 1)
+        ok = inside & ~self.map_walls[self.layout_id, y, x]
+        self.player_pos[ok] = new_pos[ok]
+
+        dones = np.all(self.player_pos == self.block_pos, axis=1)
+        rewards = dones.astype(np.int64)
+        self.scores += rewards
+        if dones.any():
+            self.reset(dones)
+        return (self.player_pos, self.block_pos), rewards, dones
@@ -0,0 +1,297 @@
+"""Medidas de desempenho do jogo e do servidor MCP.
+
+Mede, sem abrir janela:
+  passos        Game.move_player + update (passos por segundo)
+  get_map       Game.get_map em mapas gerados de tamanhos crescentes
+  captura_jpg   caminho do ver_mapa_em_JPG (grab do quadro + JPEG), com e sem cache
+  mcp.sse       ida e volta de ferramentas num servidor local de verdade
+                (block_picker_MCP.py --sem-janela num subprocesso, via HTTP/SSE)
+  mcp.memoria   as mesmas chamadas por streams em memória, sem o transporte
+
+Cada medida traz p50/p95/p99 em microssegundos por operação e a vazão em
+operações por segundo. O resultado pode ser gravado em JSON e comparado com
+uma linha de base: a saída indica as medidas com vazão pior que a base além
+da tolerância e termina com código 1.
+
+Uso:
+  python benchmark.py --saida atual.json
+  python benchmark.py --base base.json --tolerancia 0.15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+TAMANHOS = (11, 50, 200, 1000)
+
+
+def _stats(samples, ops_per_sample=1):
+    """samples em segundos (cada um cobrindo ops_per_sample operações)."""
+    per_op = sorted(s / ops_per_sample for s in samples)
+
+    def pct(p):
+        return per_op[min(len(per_op) - 1, int(round(p / 100 * (len(per_op) - 1))))] * 1e6
+
+    total = sum(samples)
+    return {
+        "p50_us": round(pct(50), 3),
+        "p95_us": round(pct(95), 3),
+        "p99_us": round(pct(99), 3),
+        "ops_por_s": round(len(samples) * ops_per_sample / total, 1) if total else None,
+        "amostras": len(samples),
+    }
+
+
+def _time(fn, repeticoes, ops_per_sample=1):
+    clock = time.perf_counter
+    samples = []
+    for _ in range(repeticoes):
+        t = clock()
+        fn()
+        samples.append(clock() - t)
+    return _stats(samples, ops_per_sample)
+
+
+def _prepare_maps():
+    """Pacote temporário com os mapas do jogo e os mapas grandes gerados.
+
+    Precisa rodar antes de importar engine/game_maps, que leem
+    BLOCK_PICKER_MAPAS na importação.
+    """
+    from map_generator import generate
+    from map_loader import MapPack, pack
+    base = MapPack(os.environ.get("BLOCK_PICKER_MAPAS") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapas"))
+    maps = list(base)
+    extra = {}
+    for size in TAMANHOS:
+        extra[size] = len(maps)
+        maps.append({"name": f"bench {size}x{size}", "layout": generate(size, size, 0.2, "aleatorio", seed=size)})
+    fd, path = tempfile.mkstemp(suffix=".jsonl", prefix="block_picker_bench_")
+    os.close(fd)
+    pack(maps, path)
+    os.environ["BLOCK_PICKER_MAPAS"] = path
+    return path, extra
+
+
+def bench_passos(repeticoes):
+    import engine
+    game = engine.Game(0, seed=0)
+    game.start()
+    moves = ["up", "right", "down", "left"] * 250
+
+    def run():
+        for direction in moves:
+            game.move_player(direction)
+            if game.update():
+                game.start()
+
+    return _time(run, repeticoes, len(moves))
+
+
+def bench_get_map(extra, repeticoes):
+    import engine
+    result = {}
+    for size, map_idx in extra.items():
+        game = engine.Game(map_idx, seed=0)
+        game.start()
+        moves = ["up", "down", "left", "right"]
+        state = {"k": 0}
+
+        def run():
+            # Um movimento antes de cada chamada, senão o cache do get_map responde tudo
+            game.move_player(moves[state["k"] % 4])
+            state["k"] += 1
+            game.get_map()
+
+        result[f"{size}x{size}"] = _time(run, max(5, repeticoes // max(1, size // 50)))
+    return result
+
+
+def bench_captura(repeticoes):
+    import pygame
+    import engine
+    import rasterizer
+    from captura import FrameCapture
+    game = engine.Game(0, seed=0)
+    frame = rasterizer.render(game)
+    surface = pygame.Surface((frame.shape[1], frame.shape[0]))
+    pygame.surfarray.blit_array(surface, frame.transpose(1, 0, 2))
+    capture = FrameCapture()
+    state = {"k": 0}
+
+    def novo_quadro():
+        state["k"] += 1
+        capture.grab(surface, state["k"])
+        capture.encode("JPEG", qualidade=75)
+
+    return {
+        "novo_quadro": _time(novo_quadro, repeticoes),
+        "cache": _time(lambda: capture.encode("JPEG", qualidade=75), repeticoes),
+    }
+
+
+# Ferramentas medidas em mcp.*; executar_lote faz as outras três numa chamada só
+MCP_CALLS = {
+    "pontuacao": {},
+    "pedir_mapa": {},
+    "mover_agora": {"direcoes": ["left", "right"]},
+    "executar_lote": {"operacoes": [{"op": "mover", "direcoes": ["left", "right"]}, {"op": "pontuacao"}, {"op": "mapa"}]},
+}
+
+
+async def _time_calls(client, repeticoes):
+    await client.call_tool("iniciar_jogo", {})
+    clock = time.perf_counter
+    result = {}
+    for name, args in MCP_CALLS.items():
+        samples = []
+        for _ in range(repeticoes):
+            t = clock()
+            await client.call_tool(name, args)
+            samples.append(clock() - t)
+        result[name] = _stats(samples)
+    return result
+
+
+def bench_mcp_memoria(repeticoes):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from mcp.shared.memory import create_connected_server_and_client_session
+    import block_picker_MCP
+    # O FastMCP registra cada chamada em INFO, o que atrapalha a saída e a medida
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+
+    async def run():
+        async with create_connected_server_and_client_session(block_picker_MCP.mcp._mcp_server) as client:
+            return await _time_calls(client, repeticoes)
+
+    return asyncio.run(run())
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_port(port, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"o servidor MCP terminou com código {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"o servidor MCP não abriu a porta {port} em {timeout:.0f}s")
+
+
+def bench_mcp_sse(repeticoes):
+    """Sobe o servidor sem janela num subprocesso e mede pelo cliente SSE do mcp.
+
+    Sem o aquecimento do planner: o BFS em segundo plano disputaria o GIL
+    com o servidor enquanto as chamadas são medidas.
+    """
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    here = os.path.dirname(os.path.abspath(__file__))
+    port = _free_port()
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    proc = subprocess.Popen([sys.executable, os.path.join(here, "block_picker_MCP.py"), "--sem-janela", "--sem-aquecimento", "--porta", str(port)],
+                            cwd=here, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    async def run():
+        async with sse_client(f"http://127.0.0.1:{port}/sse") as (read, write):
+            async with ClientSession(read, write) as client:
+                await client.initialize()
+                return await _time_calls(client, repeticoes)
+
+    try:
+        _wait_port(port, proc)
+        return asyncio.run(run())
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict) and "ops_por_s" not in value:
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def compare(results, base, tolerancia):
+    """Lista de (medida, vazão base, vazão atual, razão) das que pioraram além da tolerância."""
+    current = dict(_flatten(results["medidas"]))
+    regressions = []
+    for name, old in _flatten(base["medidas"]):
+        new = current.get(name)
+        if not new or not old.get("ops_por_s") or not new.get("ops_por_s"):
+            continue
+        ratio = new["ops_por_s"] / old["ops_por_s"]
+        if ratio < 1.0 - tolerancia:
+            regressions.append((name, old["ops_por_s"], new["ops_por_s"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Block Picker.")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--saida", default=None, help="grava o resultado neste JSON")
+    parser.add_argument("--base", default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="queda de vazão aceita (0.10 = 10%%)")
+    parser.add_argument("--sem-mcp", action="store_true", help="não mede as ferramentas MCP")
+    args = parser.parse_args()
+
+    path, extra = _prepare_maps()
+    try:
+        medidas = {
+            "passos": bench_passos(args.repeticoes),
+            "get_map": bench_get_map(extra, args.repeticoes),
+            "captura_jpg": bench_captura(args.repeticoes),
+        }
+        if not args.sem_mcp:
+            medidas["mcp"] = {"sse": bench_mcp_sse(args.repeticoes), "memoria": bench_mcp_memoria(args.repeticoes)}
+    finally:
+        os.remove(path)
+
+    results = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "medidas": medidas,
+    }
+    for name, stats in _flatten(medidas):
+        print(f"{name:28s} {stats['ops_por_s']:>12.1f} op/s   p50 {stats['p50_us']:>10.1f} us   "
+              f"p95 {stats['p95_us']:>10.1f} us   p99 {stats['p99_us']:>10.1f} us")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regressions = compare(results, base, args.tolerancia)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSÃO {name}: {old:.1f} -> {new:.1f} op/s ({(1 - ratio) * 100:.0f}% mais lento)")
+        if regressions:
+            sys.exit(1)
+        print("Sem regressões em relação à base.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,41 @@
-from PIL import Image as PILImage
 from PIL import ImageDraw  # pip install pillow
-import io
 import pygame #pip install pygame
-import random
-from mcp.server.fastmcp import FastMCP # pip install mcp
-import base64
+from mcp.server.fastmcp import Context, FastMCP # pip install mcp
 from game_maps import MAPS
+import engine
+import asyncio
+import json
+import uuid
+from collections import namedtuple
+import weakref
+import observations
+import planner
+import rasterizer
+from captura import FrameCapture, encode_frame, encode_options
+from events import EventLog
+from scheduler import Scheduler
+from sessions import SessionManager
+from engine import DIRECTIONS
 
 
-# Hand-drawn map layout (use '#' for wall, 'O' for open space)
-MAP_LAYOUT_ORIGINAL = MAPS[0]["layout"]
-MAP_LAYOUT = list(MAP_LAYOUT_ORIGINAL)
-
 BLOCK_SIZE = 40
-ROWS = len(MAP_LAYOUT)
-COLS = len(MAP_LAYOUT[0])
-WIDTH, HEIGHT = COLS * BLOCK_SIZE, ROWS * BLOCK_SIZE
+# Tamanho em pixels do mapa atual (a janela tem 60 a mais para o placar)
+WIDTH, HEIGHT = 0, 0
+# Quadros desenhados por segundo; a lógica não depende disso
 FPS = 10
-
-# Directions
-DIRECTIONS = {
-    'up': (0, -1),
-    'down': (0, 1),
-    'left': (-1, 0),
-    'right': (1, 0)
-}
+# Passos de lógica por segundo (um movimento da fila por passo); None aplica
+# cada comando assim que ele chega
+TICK_RATE = None
+# Com sessões isoladas cada cliente MCP joga no seu próprio Game (sem janela);
+# sem elas todos os clientes controlam o jogo mostrado na janela
+SESSOES_ISOLADAS = False
+MAX_SESSOES = 512
+SESSAO_OCIOSA_SEGUNDOS = 30 * 60
 
 # MCP server
 mcp = FastMCP("Block Picker Game")
 
 
-def find_positions_and_clean_map():
-    player_pos = None
-    reward_pos = None
-    new_map = []
-    for y, row in enumerate(MAP_LAYOUT):
-        new_row = list(row)
-        for x, cell in enumerate(row):
-            if cell == 'P':
-                player_pos = [x, y]
-                new_row[x] = 'O'
-            elif cell == 'R':
-                reward_pos = [x, y]
-                new_row[x] = 'O'
-        new_map.append(''.join(new_row))
-    return player_pos, reward_pos, new_map
-
-
 def draw_checkbox(screen, checked, rect, font):
     pygame.draw.rect(screen, (220, 220, 220), rect)
     pygame.draw.rect(screen, (0, 0, 0), rect, 2)
@@ -60,196 +49,530 @@ def draw_checkbox(screen, checked, rect, font):
     screen.blit(label, label_pos)
 
 
-class Game:
-    def __init__(self, map_idx=0):
-        global MAP_LAYOUT, MAP_LAYOUT_ORIGINAL, selected_map_idx
-        self.map_idx = map_idx
-        selected_map_idx = map_idx
-        MAP_LAYOUT_ORIGINAL = MAPS[self.map_idx]["layout"]
-        MAP_LAYOUT = list(MAP_LAYOUT_ORIGINAL)
-        player_pos, reward_pos, cleaned_map = find_positions_and_clean_map()
-        self.map_layout = cleaned_map
-        MAP_LAYOUT = self.map_layout  # update global for rendering
-        # Player
-        if player_pos:
-            self.player_pos = player_pos
-        else:
-            self.player_pos = self.find_first_open()
-        # Reward
-        if reward_pos:
-            self.block_pos = reward_pos
-        else:
-            self.block_pos = self.random_block()
-        self.score = 0
-        self.move_command = None
-        self.started = False  # se está jogando
-        self.show_reward_screen = False  # se mostra tela de recompensa
-        self.in_transition = False
-        self.transition_start = None
-
-    def start(self):
-        self.started = True
-        self.show_reward_screen = False
-        self.in_transition = False
-        self.transition_start = None
+DROPDOWN_ITEM = 40  # altura de cada opção da lista de mapas
 
-    def reset(self, map_idx=None):
-        if map_idx is None:
-            map_idx = self.map_idx
-        self.__init__(map_idx)
-
-    def find_first_open(self):
-        for y, row in enumerate(self.map_layout):
-            for x, cell in enumerate(row):
-                if cell == 'O':
-                    return [x, y]
-        return [1, 1]  # fallback
-
-    def random_block(self):
-        while True:
-            x = random.randint(0, COLS - 1)
-            y = random.randint(0, ROWS - 1)
-            if self.map_layout[y][x] == 'O' and [x, y] != self.player_pos:
-                return [x, y]
-
-    def move_player(self, direction):
-        if direction in DIRECTIONS:
-            dx, dy = DIRECTIONS[direction]
-            new_x = self.player_pos[0] + dx
-            new_y = self.player_pos[1] + dy
-            if 0 <= new_x < COLS and 0 <= new_y < ROWS:
-                if self.map_layout[new_y][new_x] == 'O':
-                    self.player_pos = [new_x, new_y]
-
-    def update(self):
-        global selected_map_idx, game, MAP_LAYOUT_ORIGINAL, MAP_LAYOUT, ROWS, COLS, WIDTH, HEIGHT, sequencial_mode, transition_timer, all_maps_completed
-        if self.player_pos == self.block_pos:
-            self.score += 1
-            self.show_reward_screen = True
-            self.started = False
-            if sequencial_mode:
-                # Se modo sequencial, inicia transição
-                self.in_transition = True
-                self.transition_start = pygame.time.get_ticks()
-                transition_timer = self.transition_start
-                # Se último mapa, marca todos completos
-                if selected_map_idx == len(MAPS) - 1:
-                    all_maps_completed = True
+
+def dropdown_page(first, window_height):
+    """Opções da lista de mapas que cabem na janela, começando no mapa first.
+
+    Retorna (índices, por_pagina): por_pagina é None quando todos os mapas
+    cabem; senão a última linha da lista vira '< anterior' / 'próximos >'.
+    Só os mapas da página são lidos, então um pacote grande continua lazy.
+    """
+    fit = max(2, (window_height - 10) // DROPDOWN_ITEM - 1)
+    total = len(MAPS)
+    if total <= fit:
+        return range(total), None
+    per_page = fit - 1
+    return range(first, min(first + per_page, total)), per_page
+
+
+def dropdown_rects(count, paged):
+    """Retângulos das count opções e, com paginação, dos botões anterior/próximos."""
+    options = [pygame.Rect(10, 10 + DROPDOWN_ITEM * (k + 1), 200, DROPDOWN_ITEM) for k in range(count)]
+    if not paged:
+        return options, None, None
+    y = 10 + DROPDOWN_ITEM * (count + 1)
+    return options, pygame.Rect(10, y, 100, DROPDOWN_ITEM), pygame.Rect(110, y, 100, DROPDOWN_ITEM)
+
+
+def clamp_page(first, per_page):
+    last = max(0, len(MAPS) - per_page)
+    return max(0, min(first, last))
+
+
+def build_background(map_layout, wall_img, open_color):
+    """Superfície com o mapa estático (paredes e chão), desenhada uma vez por mapa."""
+    background = pygame.Surface((len(map_layout[0]) * BLOCK_SIZE, len(map_layout) * BLOCK_SIZE))
+    background.fill((30, 30, 30))
+    for y, row in enumerate(map_layout):
+        for x, cell in enumerate(row):
+            rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+            if cell == '#':
+                background.blit(wall_img, (x * BLOCK_SIZE, y * BLOCK_SIZE))
             else:
-                # Modo normal: não faz nada especial
-                pass
-
-    def next_map(self):
-        global selected_map_idx, game, MAP_LAYOUT_ORIGINAL, MAP_LAYOUT, ROWS, COLS, WIDTH, HEIGHT, all_maps_completed
-        selected_map_idx += 1
-        if selected_map_idx >= len(MAPS):
-            all_maps_completed = True
-            selected_map_idx = 0
-            game.reset(selected_map_idx)
-            return
-        MAP_LAYOUT_ORIGINAL = MAPS[selected_map_idx]["layout"]
-        MAP_LAYOUT = list(MAP_LAYOUT_ORIGINAL)
-        ROWS = len(MAP_LAYOUT)
-        COLS = len(MAP_LAYOUT[0])
-        WIDTH, HEIGHT = COLS * BLOCK_SIZE, ROWS * BLOCK_SIZE
-        game = Game(selected_map_idx)
-        game.start()
+                pygame.draw.rect(background, open_color, rect)
+    return background
 
-    def set_move(self, direction):
-        self.move_command = direction
-        print("Moveu ", direction)
-
-    def get_score(self):
-        return self.score
-
-    def get_map(self):
-        """Retorna uma string representando o mapa do jogo com cerca (#), O para livre, P para player e R para recompensa."""
-        grid = [list(row) for row in self.map_layout]
-        px, py = self.player_pos
-        bx, by = self.block_pos
-        if grid[py][px] == 'O':
-            grid[py][px] = 'P'
-        if grid[by][bx] == 'O':
-            grid[by][bx] = 'R'
-        print("grid\n", grid)
-        return '\n'.join(''.join(row) for row in grid)
+
+class Game(engine.Game):
+    """Game do engine que mantém atualizados o mapa selecionado e o tamanho da janela."""
+
+    def reset(self, map_idx=None):
+        # Troca de mapa no próprio objeto: quem guardou uma referência a este
+        # jogo (ex.: o gerenciador de sessões) continua vendo o jogo certo
+        global selected_map_idx, WIDTH, HEIGHT
+        with self.lock:
+            super().reset(map_idx)
+            selected_map_idx = self.map_idx
+            WIDTH, HEIGHT = self.cols * BLOCK_SIZE, self.rows * BLOCK_SIZE
 
 selected_map_idx = 0
-sequencial_mode = False
-transition_timer = None
-all_maps_completed = False
 game = Game(selected_map_idx)
+game.events = EventLog()
+capture = FrameCapture()
+
+
+def _new_session_game():
+    session_game = engine.Game()
+    session_game.events = EventLog()
+    return session_game
+
+
+def _end_session_game(session_game):
+    # Grava o episódio em andamento da sessão descartada (com --gravar)
+    if session_game.trace is not None:
+        session_game.trace.end(session_game)
+
+
+sessions = SessionManager(_new_session_game, max_sessions=MAX_SESSOES, idle_timeout=SESSAO_OCIOSA_SEGUNDOS,
+                          on_evict=_end_session_game)
+# Última janela enviada por 'ver_arredores' a cada cliente, para o formato diff
+last_views = SessionManager(dict, max_sessions=MAX_SESSOES, idle_timeout=SESSAO_OCIOSA_SEGUNDOS)
+
+
+# Id de cada conexão MCP. A chave é o próprio ServerSession: o client_id vem
+# do cliente (qualquer um pode mandar o de outro) e id() é reaproveitado
+# depois que a conexão some. A referência fraca some junto com a conexão.
+_session_ids = weakref.WeakKeyDictionary()
+
+
+def _session_id(ctx):
+    """Id da conexão do cliente MCP, criado na primeira chamada dela."""
+    try:
+        session = ctx.session
+    except ValueError:
+        # Chamada fora de uma requisição MCP (ex.: direto pelo Python)
+        return "local"
+    session_id = _session_ids.get(session)
+    if session_id is None:
+        session_id = _session_ids[session] = f"conexao-{uuid.uuid4().hex}"
+    return session_id
+
+
+def _jogo(ctx):
+    """Jogo em que a ferramenta deve atuar: o da janela ou o da sessão do cliente."""
+    if not SESSOES_ISOLADAS:
+        return game
+    return sessions.get(_session_id(ctx))
+
+
+# Formatos de resposta: 'bits' só existe onde há máscara de paredes
+FORMATOS_MAPA = ("texto", "json", "bits")
+FORMATOS_RESPOSTA = ("texto", "json")
+
+
+def _formato_invalido(formatos):
+    return f"Formato inválido. Use: {', '.join(formatos)}."
+
+
+NAO_INICIADO = "O jogo ainda não foi iniciado. Use o botão ou a ferramenta 'iniciar_jogo' para começar."
+
+
+def _erro_json(mensagem):
+    return observations.to_json({"erro": mensagem})
+
 
 @mcp.tool()
-def mover(direcao: str) -> str:
-    """Move o jogador na direção especificada (up, down, left, right)."""
+def mover(direcao: str, ctx: Context, formato: str = "texto") -> str:
+    """Move o jogador na direção especificada (up, down, left, right).
+    formato 'json' responde {"direcao": ..., "ok": true} em vez da frase."""
+    if formato not in FORMATOS_RESPOSTA:
+        return _formato_invalido(FORMATOS_RESPOSTA)
     if direcao in DIRECTIONS:
-        game.set_move(direcao)
+        game = _jogo(ctx)
+        if SESSOES_ISOLADAS:
+            # Sem janela não há loop para consumir a fila de comandos
+            with game.lock:
+                if game.started:
+                    game.move_player(direcao)
+                    game.update()
+        else:
+            game.set_move(direcao)
+        if formato == "json":
+            return observations.to_json({"direcao": direcao, "ok": True})
         return f"Movendo para {direcao}"
     else:
+        if formato == "json":
+            return _erro_json("Direção inválida. Use: up, down, left, right.")
         return "Direção inválida. Use: up, down, left, right."
 
+
+@mcp.tool()
+def mover_agora(direcoes: list[str], ctx: Context, formato: str = "texto") -> str:
+    """Aplica na hora uma lista de movimentos (up, down, left, right) e retorna posição, pontuação e mapa resultantes.
+    Para no primeiro movimento que pegar a recompensa. formato: 'texto', 'json' (estado com paredes em RLE)
+    ou 'bits' (paredes em bits, base64); veja pedir_mapa."""
+    try:
+        return _mover_agora(_jogo(ctx), direcoes, formato)
+    except ValueError as e:
+        return _erro_json(str(e)) if formato in ("json", "bits") else str(e)
+
+
+def _mover_agora(game, direcoes, formato):
+    """mover_agora num jogo; ValueError quando o formato, as direções ou o estado do jogo impedem mover."""
+    if formato not in FORMATOS_MAPA:
+        raise ValueError(_formato_invalido(FORMATOS_MAPA))
+    invalidas = [d for d in direcoes if d not in DIRECTIONS]
+    if invalidas:
+        raise ValueError(f"Direção inválida: {', '.join(map(str, invalidas))}. Use: up, down, left, right.")
+    with game.lock:
+        if not game.started:
+            raise ValueError(NAO_INICIADO)
+        # Movimentos que 'mover' deixou na fila vêm antes destes
+        game.apply_pending()
+        feitos = 0
+        pegou = False
+        for direcao in direcoes:
+            if not game.started:
+                break
+            game.move_player(direcao)
+            feitos += 1
+            if game.update():
+                pegou = True
+                break
+        if formato != "texto":
+            state = observations.map_state(game, "rle" if formato == "json" else "bits")
+            state.update(movimentos=feitos, pegou=pegou)
+            return observations.to_json(state)
+        px, py = game.player_pos
+        resposta = f"Movimentos aplicados: {feitos}\nPosição: ({px}, {py})\nPontuação: {game.get_score()}\n"
+        if pegou or game.show_reward_screen:
+            return resposta + "Parabéns! Você pegou a recompensa. Use 'iniciar_jogo' para jogar novamente."
+        return resposta + game.get_map()
+
+
+def _pontos_do_plano(game, origem, destino):
+    """Usa a posição do jogador e da recompensa quando origem/destino não vêm."""
+    origem = planner.as_point(origem) if origem else tuple(game.player_pos)
+    destino = planner.as_point(destino) if destino else tuple(game.block_pos)
+    return origem, destino
+
+
+async def _planejar(func, layout, origem, destino):
+    """Chama planner.path/distance; o BFS de um destino novo roda fora do loop de eventos."""
+    if planner.is_cached(layout, destino):
+        return func(layout, origem, destino)
+    return await asyncio.to_thread(func, layout, origem, destino)
+
+
+@mcp.tool()
+async def caminho(ctx: Context, origem: list[int] | None = None, destino: list[int] | None = None) -> str:
+    """Retorna o menor caminho como lista de direções de origem [x, y] até destino [x, y].
+    Sem argumentos, vai do jogador até a recompensa. O resultado pode ser passado para 'mover_agora'."""
+    game = _jogo(ctx)
+    try:
+        with game.lock:
+            origem, destino = _pontos_do_plano(game, origem, destino)
+            layout = game.map_layout
+    except ValueError as e:
+        return str(e)
+    moves = await _planejar(planner.path, layout, origem, destino)
+    if moves is None:
+        return f"Não existe caminho de {origem} até {destino}."
+    return ", ".join(moves)
+
+
+@mcp.tool()
+async def distancia(ctx: Context, origem: list[int] | None = None, destino: list[int] | None = None) -> str:
+    """Retorna o número de passos do menor caminho de origem [x, y] até destino [x, y] (padrão: jogador até recompensa)."""
+    game = _jogo(ctx)
+    try:
+        with game.lock:
+            origem, destino = _pontos_do_plano(game, origem, destino)
+            layout = game.map_layout
+    except ValueError as e:
+        return str(e)
+    d = await _planejar(planner.distance, layout, origem, destino)
+    if d is None:
+        return f"Não existe caminho de {origem} até {destino}."
+    return str(d)
+
+
 @mcp.tool()
-def pontuacao() -> str:
-    """Retorna a pontuação atual do jogador."""
-    return f"Pontuação: {game.get_score()}"
+def pontuacao(ctx: Context, formato: str = "texto") -> str:
+    """Retorna a pontuação atual do jogador. formato 'json' responde {"pontuacao": N, "estado": ...}."""
+    try:
+        return _pontuacao(_jogo(ctx), formato)
+    except ValueError as e:
+        return str(e)
+
+
+def _pontuacao(game, formato):
+    if formato not in FORMATOS_RESPOSTA:
+        raise ValueError(_formato_invalido(FORMATOS_RESPOSTA))
+    with game.lock:
+        if formato == "json":
+            return observations.to_json({"pontuacao": game.get_score(), "estado": game.estado})
+        return f"Pontuação: {game.get_score()}"
 
 
 @mcp.tool()
-def pedir_mapa() -> str:
-    """Retorna o desenho do mapa atual (P=player, R=recompensa, O=livre, #=bloqueado)."""
-    if not game.started and not game.show_reward_screen:
-        return "O jogo ainda não foi iniciado. Use o botão ou a ferramenta 'iniciar_jogo' para começar."
-    if game.show_reward_screen:
-        return "Parabéns! Você pegou a recompensa. Clique em 'Iniciar' para jogar novamente."
-    return game.get_map()
+def pedir_mapa(ctx: Context, formato: str = "texto", paredes: bool = True) -> str:
+    """Retorna o desenho do mapa atual (P=player, R=recompensa, O=livre, #=bloqueado).
+    formato 'json' devolve {estado, mapa, largura, altura, jogador [x, y], recompensa [x, y], pontuacao, paredes},
+    com paredes em RLE: tamanhos de trechos alternados livre/parede, linha por linha, começando por livres.
+    formato 'bits' é igual, mas com paredes em base64, 1 bit por célula (1 = parede, bit mais alto primeiro).
+    paredes=False omite a máscara (ela só muda quando muda o mapa)."""
+    try:
+        return _pedir_mapa(_jogo(ctx), formato, paredes)
+    except ValueError as e:
+        return str(e)
+
+
+def _pedir_mapa(game, formato, paredes=True):
+    """pedir_mapa num jogo; ValueError com formato inválido ou, em texto, com o jogo não iniciado."""
+    if formato not in FORMATOS_MAPA:
+        raise ValueError(_formato_invalido(FORMATOS_MAPA))
+    with game.lock:
+        if formato != "texto":
+            encoding = ("rle" if formato == "json" else "bits") if paredes else None
+            return observations.to_json(observations.map_state(game, encoding))
+        if not game.started and not game.show_reward_screen:
+            raise ValueError(NAO_INICIADO)
+        if game.show_reward_screen:
+            return "Parabéns! Você pegou a recompensa. Clique em 'Iniciar' para jogar novamente."
+        return game.get_map()
 
 
 @mcp.tool()
-def ver_mapa_em_JPG() -> str:
+def ver_arredores(ctx: Context, raio: int = 2, formato: str = "texto") -> str:
+    """Retorna só a janela de raio células em volta do jogador (fora do mapa aparece como #).
+    formato: 'texto' (linhas do mapa), 'rle' (cada linha como contagem+caractere, ex.: 3#2O1P)
+    ou 'diff' (só as células que mudaram desde a última janela enviada a você, como x,y=c).
+    A primeira linha é a origem (x, y) do canto superior esquerdo da janela."""
+    if formato not in ("texto", "rle", "diff"):
+        return "Formato inválido. Use: texto, rle, diff."
+    raio = max(0, min(int(raio), 100))
+    game = _jogo(ctx)
+    with game.lock:
+        if not game.started and not game.show_reward_screen:
+            return "O jogo ainda não foi iniciado. Use o botão ou a ferramenta 'iniciar_jogo' para começar."
+        if game.show_reward_screen:
+            return "Parabéns! Você pegou a recompensa. Clique em 'Iniciar' para jogar novamente."
+        origin, rows = game.get_view(raio)
+        layout = game.layout
+    cache = last_views.get(_session_id(ctx))
+    cells = observations.view_cells(origin, rows)
+    previous = cache.get("cells") if cache.get("layout") is layout else None
+    cache["layout"] = layout
+    cache["cells"] = cells
+    header = f"Origem: ({origin[0]}, {origin[1]})\n"
+    if formato == "rle":
+        return header + '\n'.join(observations.run_length(row) for row in rows)
+    if formato == "diff" and previous is not None:
+        changed = observations.view_diff(previous, cells)
+        if not changed:
+            return header + "Sem mudanças."
+        return header + "; ".join(f"{x},{y}={cell}" for (x, y), cell in changed)
+    return header + '\n'.join(rows)
+
+
+def _eventos_json(events, lost, cursor):
+    return json.dumps({"cursor": cursor, "perdidos": lost, "eventos": events},
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+@mcp.tool()
+async def eventos(ctx: Context, desde: int = 0, espera: float = 10.0) -> str:
+    """Espera (até espera segundos) e retorna em JSON os eventos do jogo depois do id desde:
+    movimento (pos, d), recompensa (pontuacao), reinicio (mapa, pos, recompensa, estado) e tela (estado).
+    Use o cursor retornado como próximo desde. perdidos=true indica que eventos antigos saíram da fila."""
+    log = _jogo(ctx).events
+    espera = max(0.0, min(float(espera), 60.0))
+    events, lost = await log.wait_async(desde, espera)
+    cursor = events[-1]["id"] if events else max(desde, 0)
+    return _eventos_json(events, lost, cursor)
+
+
+@mcp.tool()
+async def acompanhar_eventos(ctx: Context, desde: int = 0, duracao: float = 30.0, max_eventos: int = 1000) -> str:
+    """Assina os eventos do jogo: cada evento é enviado na hora como notificação de log (JSON)
+    enquanto a chamada dura (até duracao segundos ou max_eventos eventos). Retorna o cursor final."""
+    log = _jogo(ctx).events
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, min(float(duracao), 600.0))
+    cursor = max(desde, 0)
+    sent = 0
+    lost_any = False
+    while sent < max_eventos:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        events, lost = await log.wait_async(cursor, remaining)
+        lost_any = lost_any or lost
+        for event in events[:max_eventos - sent]:
+            await ctx.info(json.dumps(event, ensure_ascii=False, separators=(",", ":")))
+            cursor = event["id"]
+            sent += 1
+    return _eventos_json([], lost_any, cursor)
+
+
+def _imagem(ctx, formato, qualidade=85, escala=1.0):
+    """Imagem em base64 do jogo do cliente: o último quadro da janela ou, com
+    sessões isoladas, o tabuleiro da sessão desenhado pelo rasterizer."""
+    if not SESSOES_ISOLADAS:
+        return capture.encode(formato, qualidade, escala)
+    formato, qualidade, escala = encode_options(formato, qualidade, escala)
+    game = _jogo(ctx)
+    with game.lock:
+        frame = _quadro_reduzido(game, escala)
+    return encode_frame(frame, formato, qualidade)
+
+
+def _quadro_reduzido(game, escala):
+    """Tabuleiro de game desenhado já na escala pedida (blocos menores), sem redimensionar depois."""
+    return rasterizer.render(game, max(1, round(BLOCK_SIZE * escala)))
+
+
+@mcp.tool()
+def ver_mapa_em_JPG(ctx: Context) -> str:
     """Captura a tela atual do jogo no formato JPG, incluindo tela inicial, recompensa ou jogo."""
-    import pygame.surfarray
+    img_base64 = _imagem(ctx, "JPEG", qualidade=75)
+    if img_base64 is None:
+        return "Tela não disponível."
+    return img_base64
+
 
-    # A tela do pygame deve estar criada e visível
-    screen = pygame.display.get_surface()
-    if screen is None:
+@mcp.tool()
+def ver_mapa(ctx: Context, formato: str = "PNG", qualidade: int = 85, escala: float = 1.0) -> str:
+    """Captura a tela atual do jogo em base64 no formato escolhido (PNG, JPEG ou WEBP).
+    qualidade (1-100) vale para JPEG/WEBP; escala (até 1.0) reduz a imagem.
+    Com sessões isoladas a imagem é só o tabuleiro da sessão do cliente."""
+    try:
+        img_base64 = _imagem(ctx, formato, qualidade, escala)
+    except ValueError as e:
+        return str(e)
+    if img_base64 is None:
         return "Tela não disponível."
-    # Captura a tela como array
-    arr = pygame.surfarray.array3d(screen)
-    # Transforma para PIL (precisa transpor e inverter eixo)
-    img = PILImage.fromarray(arr.swapaxes(0, 1))
-    buffer = io.BytesIO()
-    img.save(buffer, format="JPEG")
-    img_bytes = buffer.getvalue()
-    img_base64 = base64.b64encode(img_bytes).decode("utf-8")
     return img_base64
 
 
 @mcp.tool()
-def iniciar_jogo() -> str:
+def iniciar_jogo(ctx: Context) -> str:
     """Inicia ou reinicia o jogo (igual ao botão Iniciar da tela). Só funciona na tela inicial ou de recompensa."""
-    if game.started:
-        return "O jogo já está em andamento. Só é possível iniciar na tela inicial ou após pegar a recompensa."
-    if not game.started or game.show_reward_screen:
+    try:
+        return _iniciar_jogo(_jogo(ctx))
+    except ValueError as e:
+        return str(e)
+
+
+def _iniciar_jogo(game):
+    with game.lock:
+        if game.started:
+            raise ValueError("O jogo já está em andamento. Só é possível iniciar na tela inicial ou após pegar a recompensa.")
         game.reset()
         game.start()
         return "Jogo iniciado!"
-    return "Só é possível iniciar na tela inicial ou após pegar a recompensa."
+
+
+@mcp.tool()
+def encerrar_sessao(ctx: Context) -> str:
+    """Descarta o jogo desta sessão (só com sessões isoladas). O próximo comando começa um jogo novo."""
+    if not SESSOES_ISOLADAS:
+        return "O servidor não está usando sessões isoladas."
+    sessions.remove(_session_id(ctx))
+    return "Sessão encerrada."
+
+
+MAX_OPERACOES = 1000
+# Cada imagem custa milissegundos para codificar; o resto do lote, microssegundos
+MAX_IMAGENS = 8
+
+# Quadro de uma operação 'imagem', codificado depois que o lote termina
+_Quadro = namedtuple("_Quadro", "frame opcoes")
+
+
+def _operacao(game, op):
+    """Resultado de uma operação de executar_lote (texto ou objeto já decodificado do json).
+
+    Levanta ValueError quando a operação falha, inclusive pelo estado do jogo
+    (ex.: mover antes de iniciar), para o lote registrar um "erro".
+    """
+    nome = op.get("op")
+    formato = op.get("formato", "texto")
+    if nome == "iniciar":
+        return _iniciar_jogo(game)
+    if nome == "mover":
+        if "direcoes" in op:
+            direcoes = op["direcoes"]
+            if not isinstance(direcoes, list):
+                raise ValueError("'direcoes' deve ser uma lista de direções (up, down, left, right).")
+        elif "direcao" in op:
+            direcoes = [op["direcao"]]
+        else:
+            raise ValueError("A operação 'mover' precisa de 'direcoes' (lista) ou 'direcao'.")
+        resultado = _mover_agora(game, direcoes, formato)
+    elif nome == "mapa":
+        resultado = _pedir_mapa(game, formato, op.get("paredes", True))
+    elif nome == "pontuacao":
+        resultado = _pontuacao(game, formato)
+    elif nome == "imagem":
+        # Desenhado do estado atual (as operações anteriores do lote já valem),
+        # só o tabuleiro, sem menus nem placar; a codificação fica para depois
+        # do lote, fora do lock
+        formato, qualidade, escala = encode_options(op.get("formato", "PNG"), op.get("qualidade", 85), op.get("escala", 1.0))
+        return _Quadro(_quadro_reduzido(game, escala), (formato, qualidade))
+    else:
+        raise ValueError(f"Operação inválida: {nome!r}. Use: iniciar, mover, mapa, pontuacao, imagem.")
+    if formato in ("json", "bits"):
+        return json.loads(resultado)
+    return resultado
+
+
+@mcp.tool()
+async def executar_lote(operacoes: list[dict], ctx: Context, parar_no_erro: bool = True) -> str:
+    """Executa em ordem, numa só chamada e sem outro comando no meio, uma lista de operações no jogo.
+    Cada operação é um objeto com "op" e os argumentos dela:
+      {"op": "iniciar"}
+      {"op": "mover", "direcoes": ["up", ...]} (ou "direcao": "up"; aplica na hora, como mover_agora)
+      {"op": "mapa", "formato": "texto"|"json"|"bits", "paredes": true}
+      {"op": "pontuacao", "formato": "texto"|"json"}
+      {"op": "imagem", "formato": "PNG"|"JPEG"|"WEBP", "qualidade": 85, "escala": 1.0} (tabuleiro atual em base64)
+    Retorna json {"resultados": [{"op": ..., "resultado": ...} ou {"op": ..., "erro": ...}], "executadas": n}.
+    Resultados em formato json/bits vêm como objetos, não como texto. No máximo MAX_IMAGENS imagens por lote."""
+    if len(operacoes) > MAX_OPERACOES:
+        return _erro_json(f"No máximo {MAX_OPERACOES} operações por lote.")
+    if sum(1 for op in operacoes if isinstance(op, dict) and op.get("op") == "imagem") > MAX_IMAGENS:
+        return _erro_json(f"No máximo {MAX_IMAGENS} imagens por lote.")
+    game = _jogo(ctx)
+    resultados = []
+    with game.lock:
+        # Os movimentos que 'mover' deixou na fila entram antes do lote
+        game.apply_pending()
+        for op in operacoes:
+            try:
+                if not isinstance(op, dict):
+                    raise ValueError("Cada operação deve ser um objeto com a chave 'op'.")
+                resultados.append({"op": op.get("op"), "resultado": _operacao(game, op)})
+            except (ValueError, TypeError) as e:
+                resultados.append({"op": op.get("op") if isinstance(op, dict) else None, "erro": str(e)})
+                if parar_no_erro:
+                    break
+    # As imagens são codificadas numa thread, sem segurar o jogo nem o loop de eventos
+    for resultado in resultados:
+        if isinstance(resultado.get("resultado"), _Quadro):
+            quadro = resultado["resultado"]
+            resultado["resultado"] = await asyncio.to_thread(encode_frame, quadro.frame, *quadro.opcoes)
+    return observations.to_json({"resultados": resultados, "executadas": len(resultados)})
 
 
 def main():
     pygame.init()
-    global MAP_LAYOUT_ORIGINAL, MAP_LAYOUT, ROWS, COLS, WIDTH, HEIGHT, game, sequencial_mode, transition_timer, all_maps_completed, selected_map_idx
+    global WIDTH, HEIGHT, game, selected_map_idx
     screen = pygame.display.set_mode((WIDTH, HEIGHT + 60))
     pygame.display.set_caption("Block Picker Game")
-    clock = pygame.time.Clock()
+    scheduler = Scheduler(FPS, TICK_RATE)
     running = True
     brown = (139, 69, 19)
     open_color = (34, 139, 34)  # verde grama
     font = pygame.font.SysFont(None, 32)
+    msg_font = pygame.font.SysFont(None, 48)
+    score_font = pygame.font.SysFont(None, 36)
     button_rect = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 - 40, 200, 80)
     dropdown_rect = pygame.Rect(10, 10, 200, 40)
     dropdown_open = False
+    dropdown_first = 0  # primeiro mapa mostrado na lista aberta
     checkbox_rect = pygame.Rect(230, 10, 30, 30)
     # Carrega imagens do player, recompensa e muralha
     player_img = pygame.image.load("player.png")
@@ -258,146 +581,264 @@ def main():
     recompensa_img = pygame.transform.scale(recompensa_img, (BLOCK_SIZE, BLOCK_SIZE))
     muralha_img = pygame.image.load("arvore.png")
     muralha_img = pygame.transform.scale(muralha_img, (BLOCK_SIZE, BLOCK_SIZE))
+    # Fundo estático do mapa atual e o que foi desenhado no último quadro,
+    # para redesenhar só as células que mudaram
+    background = None
+    background_layout = None
+    last_screen = None
+    last_player_rect = last_reward_rect = last_score_rect = None
+    last_score = None
+    score_text = None
 
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                dropdown_handled = False
-                show_dropdown = (not game.started) or game.show_reward_screen
-                if show_dropdown:
-                    if dropdown_rect.collidepoint(event.pos):
-                        dropdown_open = not dropdown_open
-                        dropdown_handled = True
-                    elif dropdown_open:
-                        for i, m in enumerate(MAPS):
-                            option_rect = pygame.Rect(10, 10 + 40 * (i + 1), 200, 40)
-                            if option_rect.collidepoint(event.pos):
-                                selected_map_idx = i
-                                MAP_LAYOUT_ORIGINAL = MAPS[selected_map_idx]["layout"]
-                                MAP_LAYOUT = list(MAP_LAYOUT_ORIGINAL)
-                                ROWS = len(MAP_LAYOUT)
-                                COLS = len(MAP_LAYOUT[0])
-                                WIDTH, HEIGHT = COLS * BLOCK_SIZE, ROWS * BLOCK_SIZE
-                                game = Game(selected_map_idx)
-                                dropdown_open = False
-                                screen = pygame.display.set_mode((WIDTH, HEIGHT + 60))
+        # O estado do jogo só muda com o lock; a thread do MCP espera o quadro terminar
+        with game.lock:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    dropdown_handled = False
+                    show_dropdown = (not game.started) or game.show_reward_screen
+                    if show_dropdown:
+                        if dropdown_rect.collidepoint(event.pos):
+                            dropdown_open = not dropdown_open
+                            if dropdown_open:
+                                # Abre na página do mapa selecionado
+                                _, per_page = dropdown_page(0, screen.get_height())
+                                if per_page:
+                                    dropdown_first = selected_map_idx - selected_map_idx % per_page
+                            dropdown_handled = True
+                        elif dropdown_open:
+                            page, per_page = dropdown_page(dropdown_first, screen.get_height())
+                            options, prev_rect, next_rect = dropdown_rects(len(page), per_page)
+                            if prev_rect is not None and prev_rect.collidepoint(event.pos):
+                                dropdown_first = clamp_page(dropdown_first - per_page, per_page)
                                 dropdown_handled = True
-                                break
-                    # Checkbox click
-                    if checkbox_rect.collidepoint(event.pos):
-                        sequencial_mode = not sequencial_mode
-                        dropdown_handled = True
-                if not dropdown_handled and not game.started:
-                    if button_rect.collidepoint(event.pos):
-                        game.reset(selected_map_idx)
-                        game.start()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    game.move_player('up')
-                elif event.key == pygame.K_DOWN:
-                    game.move_player('down')
-                elif event.key == pygame.K_LEFT:
-                    game.move_player('left')
-                elif event.key == pygame.K_RIGHT:
-                    game.move_player('right')
-
-        screen.fill((30, 30, 30))
-
-        # Sequencial mode: transition screen
-        if sequencial_mode and game.in_transition:
-            elapsed = pygame.time.get_ticks() - game.transition_start
-            msg_font = pygame.font.SysFont(None, 48)
-            if all_maps_completed:
-                msg = msg_font.render("Todos os mapas completos!", True, (255, 255, 255))
-                msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
-                screen.blit(msg, msg_rect)
-                # Volta ao menu inicial após 3 segundos
-                if elapsed > 3000:
-                    all_maps_completed = False
-                    game.reset(0)
-                    dropdown_open = False
-            else:
-                msg = msg_font.render("Próximo mapa...", True, (255, 255, 255))
-                msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
-                screen.blit(msg, msg_rect)
-                if elapsed > 3000:
-                    game.in_transition = False
-                    game.next_map()
+                            elif next_rect is not None and next_rect.collidepoint(event.pos):
+                                dropdown_first = clamp_page(dropdown_first + per_page, per_page)
+                                dropdown_handled = True
+                            for i, option_rect in zip(page, options):
+                                if option_rect.collidepoint(event.pos):
+                                    # reset atualiza selected_map_idx, WIDTH e HEIGHT
+                                    game.reset(i)
+                                    dropdown_open = False
+                                    screen = pygame.display.set_mode((WIDTH, HEIGHT + 60))
+                                    dropdown_handled = True
+                                    break
+                        # Checkbox click
+                        if checkbox_rect.collidepoint(event.pos):
+                            game.sequencial_mode = not game.sequencial_mode
+                            dropdown_handled = True
+                    if not dropdown_handled and not game.started:
+                        if button_rect.collidepoint(event.pos):
+                            game.reset(selected_map_idx)
+                            game.start()
+                elif event.type == pygame.MOUSEWHEEL and dropdown_open:
+                    _, per_page = dropdown_page(dropdown_first, screen.get_height())
+                    if per_page:
+                        dropdown_first = clamp_page(dropdown_first - event.y, per_page)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_UP:
+                        game.move_player('up')
+                    elif event.key == pygame.K_DOWN:
+                        game.move_player('down')
+                    elif event.key == pygame.K_LEFT:
+                        game.move_player('left')
+                    elif event.key == pygame.K_RIGHT:
+                        game.move_player('right')
+                    # Os comandos do MCP já passam por update() em apply_pending
+                    if game.started:
+                        game.update()
+
+            # Lógica: comandos do MCP e transições, no ritmo do scheduler. Os
+            # passos são contados em toda volta: o tempo parado no menu não vira
+            # atraso para recuperar quando o jogo começa
+            game.wakeup.clear()
+            ticks = scheduler.ticks()
+            if game.in_transition:
+                # Próximo mapa (ou volta ao menu) quando acaba o tempo da transição
+                if game.advance():
                     dropdown_open = False
-            pygame.display.flip()
-            clock.tick(FPS)
-            continue
-
-        if game.show_reward_screen:
-            msg_font = pygame.font.SysFont(None, 48)
-            # Move message higher so button does not cover it
-            msg = msg_font.render("Você pegou a recompensa!", True, (255, 255, 255))
-            msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 120))
-            screen.blit(msg, msg_rect)
-            pygame.draw.rect(screen, (70, 130, 180), button_rect)
-            text = font.render("Iniciar", True, (255, 255, 255))
-            text_rect = text.get_rect(center=button_rect.center)
-            screen.blit(text, text_rect)
-        elif not game.started:
-            pygame.draw.rect(screen, (70, 130, 180), button_rect)
-            text = font.render("Iniciar", True, (255, 255, 255))
-            text_rect = text.get_rect(center=button_rect.center)
-            screen.blit(text, text_rect)
-            title = font.render("Block Picker Game", True, (255, 255, 255))
-            title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
-            screen.blit(title, title_rect)
-        else:
-            if game.move_command:
-                game.move_player(game.move_command)
-                game.move_command = None
-            game.update()
-            for y, row in enumerate(MAP_LAYOUT):
-                for x, cell in enumerate(row):
-                    rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                    if cell == '#':
-                        screen.blit(muralha_img, (x * BLOCK_SIZE, y * BLOCK_SIZE))
+            elif game.started:
+                for _ in range(ticks):
+                    # Modo livre: tudo o que chegou; passo fixo: um movimento por passo
+                    game.apply_pending(None if TICK_RATE is None else 1)
+
+            # None = redesenhou tudo (flip); lista = só esses retângulos mudaram
+            dirty_rects = []
+            # Desenho: no máximo FPS quadros por segundo e nada com a janela minimizada
+            render = scheduler.render_due() and pygame.display.get_active()
+
+            if render:
+                # Sequencial mode: transition screen
+                if game.in_transition:
+                    screen_key = ("transicao", game.all_maps_completed)
+                    if screen_key != last_screen:
+                        screen.fill((30, 30, 30))
+                        text = "Todos os mapas completos!" if game.all_maps_completed else "Próximo mapa..."
+                        msg = msg_font.render(text, True, (255, 255, 255))
+                        msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
+                        screen.blit(msg, msg_rect)
+                        dirty_rects = None
+                    last_screen = screen_key
+                elif game.started:
+                    if game.map_layout is not background_layout:
+                        background = build_background(game.map_layout, muralha_img, open_color)
+                        background_layout = game.map_layout
+                    px, py = game.player_pos
+                    bx, by = game.block_pos
+                    player_rect = pygame.Rect(px * BLOCK_SIZE, py * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                    reward_rect = pygame.Rect(bx * BLOCK_SIZE, by * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                    score_changed = game.get_score() != last_score or score_text is None
+                    if score_changed:
+                        last_score = game.get_score()
+                        score_text = score_font.render(f'Score: {last_score}', True, (255, 255, 255))
+                    score_rect = score_text.get_rect(topleft=(10, 10))
+
+                    screen_key = ("jogo", background_layout, screen.get_size())
+                    if screen_key != last_screen:
+                        screen.fill((30, 30, 30))
+                        screen.blit(background, (0, 0))
+                        dirty_rects = None
                     else:
-                        pygame.draw.rect(screen, open_color, rect)
-            px, py = game.player_pos
-            bx, by = game.block_pos
-            # Desenha imagem do player
-            screen.blit(player_img, (px * BLOCK_SIZE, py * BLOCK_SIZE))
-            # Desenha imagem da recompensa
-            screen.blit(recompensa_img, (bx * BLOCK_SIZE, by * BLOCK_SIZE))
-            score_font = pygame.font.SysFont(None, 36)
-            score_text = score_font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
-            screen.blit(score_text, (10, 10))
-
-        # Draw dropdown menu and checkbox only if not started or reward screen
-        show_dropdown = (not game.started) or game.show_reward_screen
-        if show_dropdown:
-            pygame.draw.rect(screen, (200, 200, 200), dropdown_rect)
-            map_name = MAPS[selected_map_idx]["name"]
-            text = font.render(map_name, True, (0, 0, 0))
-            screen.blit(text, (dropdown_rect.x + 10, dropdown_rect.y + 5))
-            pygame.draw.polygon(screen, (0, 0, 0), [
-                (dropdown_rect.right - 20, dropdown_rect.y + 15),
-                (dropdown_rect.right - 10, dropdown_rect.y + 15),
-                (dropdown_rect.right - 15, dropdown_rect.y + 25)
-            ])
-            if dropdown_open:
-                for i, m in enumerate(MAPS):
-                    option_rect = pygame.Rect(10, 10 + 40 * (i + 1), 200, 40)
-                    pygame.draw.rect(screen, (220, 220, 220), option_rect)
-                    option_text = font.render(m["name"], True, (0, 0, 0))
-                    screen.blit(option_text, (option_rect.x + 10, option_rect.y + 5))
-            # Draw checkbox
-            draw_checkbox(screen, sequencial_mode, checkbox_rect, font)
-
-        pygame.display.flip()
-        clock.tick(FPS)
+                        for old, new in ((last_player_rect, player_rect), (last_reward_rect, reward_rect)):
+                            if old != new:
+                                dirty_rects += [old, new]
+                        if score_changed:
+                            dirty_rects += [last_score_rect, score_rect]
+                        for rect in dirty_rects:
+                            screen.blit(background, rect, rect)
+                    last_screen = screen_key
+
+                    # Desenha por cima do fundo só o que caiu em área redesenhada
+                    redraw = [dirty_rects is None or rect.collidelist(dirty_rects) != -1
+                              for rect in (player_rect, reward_rect, score_rect)]
+                    if redraw[0]:
+                        # Desenha imagem do player
+                        screen.blit(player_img, player_rect)
+                    if redraw[1]:
+                        # Desenha imagem da recompensa
+                        screen.blit(recompensa_img, reward_rect)
+                    if redraw[2]:
+                        screen.blit(score_text, score_rect)
+                    last_player_rect, last_reward_rect, last_score_rect = player_rect, reward_rect, score_rect
+                else:
+                    # Tela inicial ou de recompensa: só redesenha quando algo nela muda
+                    screen_key = ("menu", game.show_reward_screen, selected_map_idx, dropdown_open,
+                                  dropdown_first, game.sequencial_mode, screen.get_size())
+                    if screen_key != last_screen:
+                        screen.fill((30, 30, 30))
+                        if game.show_reward_screen:
+                            # Move message higher so button does not cover it
+                            msg = msg_font.render("Você pegou a recompensa!", True, (255, 255, 255))
+                            msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 120))
+                            screen.blit(msg, msg_rect)
+                        else:
+                            title = font.render("Block Picker Game", True, (255, 255, 255))
+                            title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+                            screen.blit(title, title_rect)
+                        pygame.draw.rect(screen, (70, 130, 180), button_rect)
+                        text = font.render("Iniciar", True, (255, 255, 255))
+                        text_rect = text.get_rect(center=button_rect.center)
+                        screen.blit(text, text_rect)
+
+                        # Draw dropdown menu and checkbox only if not started or reward screen
+                        pygame.draw.rect(screen, (200, 200, 200), dropdown_rect)
+                        map_name = MAPS.name(selected_map_idx)
+                        text = font.render(map_name, True, (0, 0, 0))
+                        screen.blit(text, (dropdown_rect.x + 10, dropdown_rect.y + 5))
+                        pygame.draw.polygon(screen, (0, 0, 0), [
+                            (dropdown_rect.right - 20, dropdown_rect.y + 15),
+                            (dropdown_rect.right - 10, dropdown_rect.y + 15),
+                            (dropdown_rect.right - 15, dropdown_rect.y + 25)
+                        ])
+                        if dropdown_open:
+                            page, per_page = dropdown_page(dropdown_first, screen.get_height())
+                            options, prev_rect, next_rect = dropdown_rects(len(page), per_page)
+                            for i, option_rect in zip(page, options):
+                                pygame.draw.rect(screen, (220, 220, 220), option_rect)
+                                option_text = font.render(MAPS.name(i), True, (0, 0, 0))
+                                screen.blit(option_text, (option_rect.x + 10, option_rect.y + 5))
+                            for rect, label in ((prev_rect, "<"), (next_rect, ">")):
+                                if rect is not None:
+                                    pygame.draw.rect(screen, (190, 190, 190), rect)
+                                    pygame.draw.rect(screen, (120, 120, 120), rect, 1)
+                                    nav_text = font.render(label, True, (0, 0, 0))
+                                    screen.blit(nav_text, nav_text.get_rect(center=rect.center))
+                        # Draw checkbox
+                        draw_checkbox(screen, game.sequencial_mode, checkbox_rect, font)
+                        dirty_rects = None
+                    last_screen = screen_key
+
+                # Quadro completo: guarda para as ferramentas de imagem se algo visível mudou
+                capture.grab(screen, (game.snapshot(), game.in_transition, game.all_maps_completed,
+                                      game.sequencial_mode, dropdown_open, dropdown_first, screen.get_size()))
+
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        scheduler.wait(game.wakeup, until=game.transition_deadline)
 
     pygame.quit()
 
+
+def run_headless():
+    """Loop sem janela: só aplica os comandos que chegam pelo MCP, sem desenhar nada."""
+    scheduler = Scheduler(fps=None, tick_rate=TICK_RATE)
+    while True:
+        with game.lock:
+            game.wakeup.clear()
+            ticks = scheduler.ticks()
+            if game.in_transition:
+                game.advance()
+            elif game.started:
+                for _ in range(ticks):
+                    game.apply_pending(None if TICK_RATE is None else 1)
+        scheduler.wait(game.wakeup, until=game.transition_deadline)
+
 if __name__ == "__main__":
+    import argparse
+    import logging
     import threading
+    parser = argparse.ArgumentParser(description="Block Picker Game com servidor MCP (SSE).")
+    parser.add_argument("--porta", type=int, default=mcp.settings.port, help="porta do servidor MCP (SSE)")
+    parser.add_argument("--sessoes", action="store_true", help="um jogo isolado por cliente MCP em vez do jogo da janela")
+    parser.add_argument("--debug", action="store_true", help="mostra no terminal cada movimento e mapa enviado")
+    parser.add_argument("--fps", type=int, default=FPS, help="quadros desenhados por segundo")
+    parser.add_argument("--passos-por-segundo", type=float, default=None,
+                        help="ritmo fixo da lógica (um movimento da fila por passo); sem ele cada comando é aplicado ao chegar")
+    parser.add_argument("--sem-janela", action="store_true", help="não abre a janela; só o servidor MCP e a lógica do jogo")
+    parser.add_argument("--sequencial", action="store_true", help="começa no modo sequencial (um mapa depois do outro)")
+    parser.add_argument("--transicao", type=float, default=engine.Game.transition_delay,
+                        help="segundos da tela entre mapas no modo sequencial (0 passa direto)")
+    parser.add_argument("--sem-aquecimento", action="store_true",
+                        help="não pré-calcula em segundo plano os caminhos dos primeiros mapas")
+    parser.add_argument("--gravar", metavar="ARQUIVO", help="acrescenta os episódios jogados a um trace binário (veja episode_trace.py)")
+    args = parser.parse_args()
+    mcp.settings.port = args.porta
+    SESSOES_ISOLADAS = args.sessoes
+    FPS = args.fps
+    TICK_RATE = args.passos_por_segundo
+    engine.Game.transition_delay = args.transicao
+    game.sequencial_mode = args.sequencial
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    if args.gravar:
+        from episode_trace import TraceWriter
+        # Vale para o jogo da janela e para os jogos das sessões
+        engine.Game.trace = TraceWriter(args.gravar)
+        game.reset()
+    if not args.sem_aquecimento:
+        # Em segundo plano: o servidor já responde enquanto os campos são calculados
+        threading.Thread(target=planner.precompute_maps, daemon=True).start()
     # Run MCP server in a separate thread
     threading.Thread(target=lambda: mcp.run(transport="sse"), daemon=True).start()
-    main()
+    try:
+        if args.sem_janela:
+            run_headless()
+        else:
+            main()
+    finally:
+        if engine.Game.trace is not None:
+            engine.Game.trace.close()
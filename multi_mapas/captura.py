@@ -0,0 +1,91 @@
+"""Captura da janela para as ferramentas de imagem do MCP.
+
+O loop da janela chama grab() logo depois de desenhar cada quadro, na thread
+principal, e a cópia só acontece quando o que está na tela mudou. As
+ferramentas (na thread do MCP) só leem o último quadro guardado, nunca a
+superfície que está sendo desenhada. Cada imagem codificada fica em cache até
+o próximo quadro diferente, então pedir a mesma imagem de novo é quase de graça.
+"""
+import base64
+import io
+import threading
+import numpy as np
+import pygame.surfarray
+from PIL import Image as PILImage
+
+FORMATOS = ("PNG", "JPEG", "WEBP")
+
+
+class FrameCapture:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Dois buffers reaproveitados: grab escreve no de trás e troca com o da
+        # frente, que é o único lido pelos encoders
+        self._front = None
+        self._back = None
+        self._key = None
+        self._encoded = {}
+
+    def grab(self, surface, key):
+        """Guarda o quadro atual de surface se key (o estado visível) mudou."""
+        if key == self._key:
+            return
+        pixels = pygame.surfarray.pixels3d(surface)
+        try:
+            shape = (pixels.shape[1], pixels.shape[0], 3)
+            if self._back is None or self._back.shape != shape:
+                self._back = np.empty(shape, dtype=np.uint8)
+            np.copyto(self._back, pixels.transpose(1, 0, 2))
+        finally:
+            del pixels  # libera o lock da superfície
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self._key = key
+            self._encoded.clear()
+
+    def encode(self, formato="PNG", qualidade=85, escala=1.0):
+        """Último quadro em base64, ou None se nenhum quadro foi capturado."""
+        formato, qualidade, escala = encode_options(formato, qualidade, escala)
+        cache_key = (formato, qualidade, escala)
+        with self._lock:
+            if self._front is None:
+                return None
+            cached = self._encoded.get(cache_key)
+            if cached is not None:
+                return cached
+            encoded = encode_frame(self._front, formato, qualidade, escala)
+            self._encoded[cache_key] = encoded
+            return encoded
+
+
+def encode_options(formato, qualidade, escala):
+    """(formato, qualidade, escala) normalizados; ValueError quando não dá para usar."""
+    if not isinstance(formato, str):
+        raise ValueError(f"Formato inválido: {formato!r}. Use: {', '.join(FORMATOS)}.")
+    formato = formato.upper()
+    if formato == "JPG":
+        formato = "JPEG"
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}. Use: {', '.join(FORMATOS)}.")
+    try:
+        qualidade = max(1, min(100, int(qualidade)))
+        escala = max(0.05, min(1.0, float(escala)))
+    except (TypeError, ValueError):
+        raise ValueError("qualidade e escala devem ser números.") from None
+    return formato, qualidade, escala
+
+
+def encode_frame(frame, formato="PNG", qualidade=85, escala=1.0):
+    """Array RGB (altura, largura, 3) uint8 codificado em base64 (ex.: um quadro do rasterizer)."""
+    formato, qualidade, escala = encode_options(formato, qualidade, escala)
+    frame = np.ascontiguousarray(frame)
+    img = PILImage.frombuffer("RGB", (frame.shape[1], frame.shape[0]), frame, "raw", "RGB", 0, 1)
+    if escala != 1.0:
+        size = (max(1, round(img.width * escala)), max(1, round(img.height * escala)))
+        img = img.resize(size, PILImage.BILINEAR)
+    buffer = io.BytesIO()
+    if formato == "PNG":
+        img.save(buffer, format=formato)
+    else:
+        img.save(buffer, format=formato, quality=qualidade)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
@@ -0,0 +1,408 @@
+"""Regras do Block Picker sem pygame.
+
+Este módulo não depende de tela nem de SDL: pode ser importado por scripts de
+avaliação para simular milhares de jogadas por segundo. A janela pygame em
+block_picker_MCP.py é só um visualizador em cima deste Game.
+"""
+import logging
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from game_maps import MAPS
+
+logger = logging.getLogger(__name__)
+
+# Directions
+DIRECTIONS = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0)
+}
+
+
+def find_positions_and_clean_map(layout):
+    """Encontra P e R no layout e devolve o mapa com essas células trocadas por 'O'."""
+    player_pos = None
+    reward_pos = None
+    new_map = []
+    for y, row in enumerate(layout):
+        new_row = list(row)
+        for x, cell in enumerate(row):
+            if cell == 'P':
+                player_pos = [x, y]
+                new_row[x] = 'O'
+            elif cell == 'R':
+                reward_pos = [x, y]
+                new_row[x] = 'O'
+        new_map.append(''.join(new_row))
+    return player_pos, reward_pos, new_map
+
+
+class FreeCells:
+    """Índice das células 'O' de um layout, montado uma vez por mapa.
+
+    Guarda só os índices y * cols + x das células livres, em ordem, num
+    array('l'). sample() sorteia uma célula em O(1), podendo excluir uma
+    célula ocupada (o jogador) sem repetir o sorteio: a posição dela no
+    array sai de uma busca binária.
+    """
+
+    def __init__(self, layout):
+        self.cols = len(layout[0]) if layout else 0
+        self.cells = array('l', (i for i, cell in enumerate(''.join(layout)) if cell == 'O'))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def cell(self, i):
+        """[x, y] da i-ésima célula livre."""
+        y, x = divmod(self.cells[i], self.cols)
+        return [x, y]
+
+    def rank(self, pos):
+        """Posição de pos ([x, y]) entre as células livres, ou None se ela não é livre."""
+        x, y = pos
+        if not 0 <= x < self.cols:
+            return None
+        flat = y * self.cols + x
+        k = bisect_left(self.cells, flat)
+        return k if k < len(self.cells) and self.cells[k] == flat else None
+
+    def sample(self, rng, exclude=None):
+        n = len(self.cells)
+        k = self.rank(exclude) if exclude is not None else None
+        if k is not None:
+            n -= 1
+        if n <= 0:
+            raise ValueError("Não há célula livre para colocar a recompensa.")
+        i = rng.randrange(n)
+        if k is not None and i >= k:
+            i += 1
+        return self.cell(i)
+
+
+class Layout:
+    """Mapa já lido, compartilhado (somente leitura) por todos os jogos nele.
+
+    As paredes ficam em um bytes de uma posição por célula (1 = bloqueado),
+    indexado por y * cols + x: o teste de colisão é O(1) e milhares de jogos no
+    mesmo mapa não ocupam memória extra com o layout.
+    """
+    __slots__ = ('lines', 'rows', 'cols', 'walls', 'text', 'player_start', 'reward_start', 'free_cells')
+
+    def __init__(self, raw_layout):
+        player_pos, reward_pos, cleaned_map = find_positions_and_clean_map(raw_layout)
+        self.lines = tuple(cleaned_map)
+        self.rows = len(self.lines)
+        self.cols = len(self.lines[0])
+        if any(len(row) != self.cols for row in self.lines):
+            raise ValueError("Todas as linhas do mapa precisam ter o mesmo tamanho.")
+        self.walls = bytes(0 if cell == 'O' else 1 for row in self.lines for cell in row)
+        # Texto do mapa sem P/R; a célula (x, y) fica em y * (cols + 1) + x
+        self.text = '\n'.join(self.lines)
+        self.player_start = tuple(player_pos) if player_pos else None
+        self.reward_start = tuple(reward_pos) if reward_pos else None
+        self.free_cells = FreeCells(self.lines)
+
+    def is_open(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and not self.walls[y * self.cols + x]
+
+
+# Soma das células dos layouts guardados por load_map; um layout ocupa uns
+# 9 bytes por célula, então 16M células dão cerca de 150 MB
+MAX_LAYOUT_CELLS = 16_000_000
+
+_layouts = OrderedDict()
+_layout_cells = 0
+_layouts_lock = threading.Lock()
+
+
+def load_map(map_idx):
+    """Layout de MAPS[map_idx], lido uma vez só enquanto couber no cache.
+
+    O cache é limitado pelo total de células (MAX_LAYOUT_CELLS) e descarta os
+    layouts usados há mais tempo; o último pedido sempre fica.
+    """
+    global _layout_cells
+    with _layouts_lock:
+        layout = _layouts.get(map_idx)
+        if layout is not None:
+            _layouts.move_to_end(map_idx)
+            return layout
+    layout = Layout(MAPS[map_idx]["layout"])
+    with _layouts_lock:
+        if map_idx in _layouts:
+            return _layouts[map_idx]
+        _layouts[map_idx] = layout
+        _layout_cells += layout.rows * layout.cols
+        while _layout_cells > MAX_LAYOUT_CELLS and len(_layouts) > 1:
+            _, old = _layouts.popitem(last=False)
+            _layout_cells -= old.rows * old.cols
+    return layout
+
+
+class Game:
+    # events.EventLog que recebe as mudanças de estado; None (padrão) não publica nada
+    events = None
+    # episode_trace.TraceWriter que grava os episódios; None (padrão) não grava
+    trace = None
+    # shared_obs.SharedObservations onde step() e reset() escrevem o estado; None (padrão) não escreve
+    shared_obs = None
+    # Segundos na tela "Próximo mapa..." do modo sequencial; 0 passa direto
+    transition_delay = 3.0
+
+    def __init__(self, map_idx=0, seed=None):
+        """seed: inteiro, None ou um random.Random já criado (usado para sortear a recompensa)."""
+        self.rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+        # O servidor MCP roda em outra thread: quem lê ou muda o estado de
+        # fora do loop da janela deve segurar este lock. Ele é reentrante e
+        # sobrevive ao reset, então dá para resetar com o lock na mão.
+        self.lock = threading.RLock()
+        # Movimentos pedidos pela ferramenta 'mover', na ordem em que chegaram
+        self.commands = deque()
+        # Ligado por set_move para acordar o loop que aplica os comandos
+        self.wakeup = threading.Event()
+        # Modo sequencial: ao pegar a recompensa vai para o próximo mapa de MAPS
+        self.sequencial_mode = False
+        self.all_maps_completed = False
+        self.reset(map_idx)
+
+    def reset(self, map_idx=None):
+        if map_idx is None:
+            map_idx = self.map_idx
+        with self.lock:
+            self._new_episode(map_idx)
+
+    def _new_episode(self, map_idx):
+        self._use_layout(map_idx)
+        if self.trace is not None:
+            self.trace.begin(self)
+        # Player
+        if self.layout.player_start:
+            self.player_pos = list(self.layout.player_start)
+        else:
+            self.player_pos = self.find_first_open()
+        # Reward
+        if self.layout.reward_start:
+            self.block_pos = list(self.layout.reward_start)
+        else:
+            self.block_pos = self.random_block()
+        self.score = 0
+        self.commands.clear()
+        self.started = False  # se está jogando
+        self.show_reward_screen = False  # se mostra tela de recompensa
+        self.in_transition = False  # tela entre um mapa e outro do modo sequencial
+        self.transition_start = None  # time.monotonic() do início da transição
+        if self.events is not None:
+            self.events.publish("reinicio", mapa=self.map_idx, pos=list(self.player_pos),
+                                recompensa=list(self.block_pos), pontuacao=self.score, estado=self.estado)
+        if self.shared_obs is not None:
+            self.shared_obs.write(self)
+
+    def _use_layout(self, map_idx):
+        self.map_idx = map_idx
+        self.layout = load_map(map_idx)
+        self.map_layout = self.layout.lines
+        self.rows = self.layout.rows
+        self.cols = self.layout.cols
+        self.free_cells = self.layout.free_cells
+        self._map_text = None  # ((player, recompensa), texto) do último get_map
+
+    @property
+    def estado(self):
+        """Tela atual: menu, jogando, recompensa, transicao ou concluido."""
+        if self.in_transition:
+            return "concluido" if self.all_maps_completed else "transicao"
+        if self.started:
+            return "jogando"
+        return "recompensa" if self.show_reward_screen else "menu"
+
+    def start(self):
+        self.started = True
+        self.show_reward_screen = False
+        self.in_transition = False
+        self.transition_start = None
+        if self.events is not None:
+            self.events.publish("tela", estado="jogando")
+
+    def find_first_open(self):
+        if len(self.free_cells):
+            return self.free_cells.cell(0)
+        return [1, 1]  # fallback
+
+    def random_block(self):
+        return self.free_cells.sample(self.rng, exclude=self.player_pos)
+
+    def move_player(self, direction):
+        if direction in DIRECTIONS:
+            if self.trace is not None:
+                self.trace.action(self, direction)
+            dx, dy = DIRECTIONS[direction]
+            new_x = self.player_pos[0] + dx
+            new_y = self.player_pos[1] + dy
+            if self.layout.is_open(new_x, new_y):
+                self.player_pos = [new_x, new_y]
+                if self.events is not None:
+                    self.events.publish("movimento", pos=self.player_pos, d=[dx, dy])
+
+    def update(self):
+        """Verifica se o jogador pegou a recompensa. Retorna True quando pegou."""
+        if self.player_pos == self.block_pos:
+            self.score += 1
+            self.show_reward_screen = True
+            self.started = False
+            if self.trace is not None:
+                self.trace.end(self)
+            if self.events is not None:
+                self.events.publish("recompensa", pontuacao=self.score)
+                self.events.publish("tela", estado="recompensa")
+            if self.sequencial_mode:
+                self.in_transition = True
+                self.transition_start = time.monotonic()
+                self.all_maps_completed = self.map_idx == len(MAPS) - 1
+                if self.events is not None:
+                    self.events.publish("tela", estado="transicao")
+                if self.transition_delay <= 0:
+                    self.advance()
+            return True
+        return False
+
+    @property
+    def transition_deadline(self):
+        """Instante (time.monotonic) em que a transição atual termina, ou None."""
+        if not self.in_transition:
+            return None
+        return self.transition_start + self.transition_delay
+
+    def advance(self, now=None):
+        """Termina a transição do modo sequencial se o tempo dela já passou.
+
+        Vai para o próximo mapa já jogando, ou, depois do último, volta ao
+        menu do primeiro mapa. Retorna True quando trocou de tela.
+        """
+        with self.lock:
+            if not self.in_transition:
+                return False
+            if (now if now is not None else time.monotonic()) < self.transition_deadline:
+                return False
+            if self.all_maps_completed:
+                self.all_maps_completed = False
+                self.reset(0)
+            else:
+                self.next_map()
+            return True
+
+    def next_map(self):
+        """Começa o mapa seguinte de MAPS; depois do último, volta ao menu do primeiro."""
+        with self.lock:
+            next_idx = self.map_idx + 1
+            if next_idx >= len(MAPS):
+                self.all_maps_completed = True
+                self.reset(0)
+                return
+            self.reset(next_idx)
+            self.start()
+
+    def step(self, action):
+        """Aplica uma jogada na hora e retorna (observação, recompensa, terminou).
+
+        A observação é ((px, py), (bx, by)); o episódio termina quando a
+        recompensa é pega. Depois disso use reset() para jogar de novo.
+        """
+        if self.show_reward_screen:
+            return self.observation(), 0, True
+        self.move_player(action)
+        done = self.update()
+        if self.shared_obs is not None:
+            self.shared_obs.write(self, done)
+        return self.observation(), 1 if done else 0, done
+
+    def observation(self):
+        return tuple(self.player_pos), tuple(self.block_pos)
+
+    def snapshot(self):
+        """Cópia barata do estado; o layout é compartilhado e não entra nela."""
+        return (self.map_idx, tuple(self.player_pos), tuple(self.block_pos),
+                self.score, self.started, self.show_reward_screen)
+
+    def restore(self, snapshot):
+        map_idx, player_pos, block_pos, score, started, show_reward_screen = snapshot
+        if map_idx != self.map_idx:
+            self._use_layout(map_idx)
+        self.player_pos = list(player_pos)
+        self.block_pos = list(block_pos)
+        self.score = score
+        self.started = started
+        self.show_reward_screen = show_reward_screen
+
+    def set_move(self, direction):
+        with self.lock:
+            self.commands.append(direction)
+        self.wakeup.set()
+        logger.debug("Moveu %s", direction)
+
+    def apply_pending(self, limit=None):
+        """Aplica, em ordem, os movimentos enfileirados por set_move (até limit, se dado).
+
+        Para quando a recompensa é pega; o que sobrar na fila é descartado no
+        próximo reset. Retorna quantos movimentos foram aplicados.
+        """
+        applied = 0
+        with self.lock:
+            while self.commands and self.started and (limit is None or applied < limit):
+                self.move_player(self.commands.popleft())
+                applied += 1
+                self.update()
+        return applied
+
+    def get_score(self):
+        return self.score
+
+    def get_view(self, radius):
+        """Janela (2 * radius + 1) quadrada centrada no jogador, como get_map.
+
+        Retorna ((x0, y0), linhas), onde (x0, y0) é a célula do canto superior
+        esquerdo no mapa. O que fica fora do mapa aparece como '#'.
+        """
+        px, py = self.player_pos
+        size = 2 * radius + 1
+        x0, y0 = px - radius, py - radius
+        left, right = max(x0, 0), min(x0 + size, self.cols)
+        rows = []
+        for y in range(y0, y0 + size):
+            if 0 <= y < self.rows:
+                rows.append('#' * (left - x0) + self.map_layout[y][left:right] + '#' * (x0 + size - right))
+            else:
+                rows.append('#' * size)
+        bx, by = self.block_pos
+        for (x, y), mark in (((bx, by), 'R'), ((px, py), 'P')):
+            if x0 <= x < x0 + size and y0 <= y < y0 + size:
+                row = rows[y - y0]
+                rows[y - y0] = row[:x - x0] + mark + row[x - x0 + 1:]
+        return (x0, y0), rows
+
+    def get_map(self):
+        """Retorna uma string representando o mapa do jogo com cerca (#), O para livre, P para player e R para recompensa."""
+        key = (tuple(self.player_pos), tuple(self.block_pos))
+        if self._map_text is not None and self._map_text[0] == key:
+            return self._map_text[1]
+        # Só P e R mudam: coloca os dois sobre o texto fixo do layout
+        text = self.layout.text
+        marks = {}
+        for (x, y), mark in zip(key, 'PR'):
+            if 0 <= x < self.cols and 0 <= y < self.rows and self.map_layout[y][x] == 'O':
+                marks.setdefault(y * (self.cols + 1) + x, mark)
+        parts = []
+        start = 0
+        for offset in sorted(marks):
+            parts += [text[start:offset], marks[offset]]
+            start = offset + 1
+        parts.append(text[start:])
+        text = ''.join(parts)
+        self._map_text = (key, text)
+        logger.debug("grid\n%s", text)
+        return text
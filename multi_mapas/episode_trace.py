@@ -0,0 +1,223 @@
+"""Gravação de episódios num arquivo binário compacto e replay rápido.
+
+Um TraceWriter ligado a um engine.Game (game.trace = writer, como
+game.events) grava cada episódio quando ele termina (recompensa pega, reset ou
+close()). No início de cada episódio o writer sorteia uma seed do próprio rng
+do jogo e a reaplica, então a recompensa sorteada sai igual no replay.
+
+Formato (little endian), sempre acrescentado ao fim do arquivo:
+  cabeçalho  b"BPTR", versão (u16)
+  episódio   mapa (u32), seed (i64), início em segundos desde a época (f64),
+             pontuação (u32), n (u32)
+             n bytes de ação (índice em ACTIONS)
+             n x u32 com os milissegundos desde a ação anterior (a primeira
+             conta a partir do início)
+Um passo ocupa 5 bytes. read_trace() lê um episódio por vez, então arquivos
+maiores que a memória podem ser percorridos.
+
+Uso:
+  python episode_trace.py resumo partidas.bptr
+  python episode_trace.py verificar partidas.bptr
+  python episode_trace.py video partidas.bptr --episodio 3 --saida ep3.gif
+"""
+import argparse
+import random
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from collections import namedtuple
+from engine import DIRECTIONS, load_map
+
+MAGIC = b"BPTR"
+VERSAO = 1
+_HEADER = struct.Struct("<4sH")
+_EPISODE = struct.Struct("<IqdII")
+
+ACTIONS = list(DIRECTIONS)
+_CODES = {direction: code for code, direction in enumerate(ACTIONS)}
+
+Episode = namedtuple("Episode", "map_idx seed inicio score actions deltas")
+
+
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, VERSAO))
+        self._lock = threading.Lock()
+        # jogo -> [mapa, seed, início, último instante, ações, deltas]; a
+        # referência fraca não segura jogos descartados (ex.: sessões que expiraram)
+        self._open = weakref.WeakKeyDictionary()
+
+    def begin(self, game):
+        """Chamado pelo Game no começo de um episódio, antes de sortear a recompensa."""
+        seed = game.rng.getrandbits(63)
+        game.rng.seed(seed)
+        now = time.time()
+        with self._lock:
+            self._finish(game)
+            self._open[game] = [game.map_idx, seed, now, now, bytearray(), array("I")]
+
+    def action(self, game, direction):
+        with self._lock:
+            entry = self._open.get(game)
+            if entry is None:
+                return
+            now = time.time()
+            entry[4].append(_CODES[direction])
+            entry[5].append(min(0xFFFFFFFF, int((now - entry[3]) * 1000)))
+            entry[3] = now
+
+    def end(self, game):
+        """Fecha o episódio do jogo (ex.: quando pega a recompensa ou a sessão é descartada)."""
+        with self._lock:
+            self._finish(game)
+
+    def _finish(self, game):
+        entry = self._open.pop(game, None)
+        if entry is None:
+            return
+        map_idx, seed, inicio, _, actions, deltas = entry
+        if not actions and not game.score:
+            return  # episódio vazio (ex.: reset seguido de outro reset)
+        if sys.byteorder == "big":
+            deltas.byteswap()
+        self._file.write(_EPISODE.pack(map_idx, seed, inicio, game.score, len(actions)))
+        self._file.write(actions)
+        self._file.write(deltas.tobytes())
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            for game in list(self._open.keys()):
+                self._finish(game)
+            self._file.close()
+
+
+def read_trace(path):
+    """Gera os Episode do arquivo, um de cada vez."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        magic, versao = _HEADER.unpack(header)
+        if magic != MAGIC or versao != VERSAO:
+            raise ValueError(f"{path}: não é um trace do Block Picker (versão {VERSAO})")
+        while True:
+            head = f.read(_EPISODE.size)
+            if len(head) < _EPISODE.size:
+                return  # fim (ou episódio cortado no meio da escrita)
+            map_idx, seed, inicio, score, n = _EPISODE.unpack(head)
+            actions = f.read(n)
+            raw = f.read(4 * n)
+            if len(actions) < n or len(raw) < 4 * n:
+                return
+            deltas = array("I")
+            deltas.frombytes(raw)
+            if sys.byteorder == "big":
+                deltas.byteswap()
+            yield Episode(map_idx, seed, inicio, score, actions, deltas)
+
+
+def initial_state(map_idx, seed):
+    """(jogador, recompensa) no início do episódio, como engine.Game faz no reset."""
+    layout = load_map(map_idx)
+    player = list(layout.player_start) if layout.player_start else layout.free_cells.cell(0)
+    if layout.reward_start:
+        return player, list(layout.reward_start)
+    return player, layout.free_cells.sample(random.Random(seed), exclude=player)
+
+
+def replay(episodes, chunk=4096):
+    """Re-simula os episódios com batch_game.BatchGame, chunk de cada vez.
+
+    Gera (episódio, pontuação, passos até a recompensa ou None) na ordem de
+    entrada. Episódios de um mesmo bloco andam juntos; os que já acabaram
+    recebem a ação nula.
+    """
+    import numpy as np
+    from batch_game import BatchGame
+
+    episodes = iter(episodes)
+    while True:
+        block = [ep for _, ep in zip(range(chunk), episodes)]
+        if not block:
+            return
+        batch = BatchGame([ep.map_idx for ep in block])
+        for i, ep in enumerate(block):
+            player, reward = initial_state(ep.map_idx, ep.seed)
+            batch.player_pos[i] = player
+            batch.block_pos[i] = reward
+        length = max(len(ep.actions) for ep in block)
+        moves = np.full((len(block), length), len(ACTIONS), dtype=np.int64)
+        for i, ep in enumerate(block):
+            moves[i, :len(ep.actions)] = np.frombuffer(ep.actions, dtype=np.uint8)
+        first = np.full(len(block), -1, dtype=np.int64)
+        for t in range(length):
+            _, rewards, _ = batch.step(moves[:, t])
+            hit = (rewards > 0) & (first < 0)
+            first[hit] = t + 1
+        for i, ep in enumerate(block):
+            yield ep, int(first[i] >= 0), (int(first[i]) if first[i] >= 0 else None)
+
+
+def frames(episode, block_size=None):
+    """Quadros RGB (rasterizer) do episódio, um por passo, começando pelo inicial."""
+    import rasterizer
+    import engine
+    game = engine.Game(episode.map_idx, seed=episode.seed)
+    game.start()
+    size = block_size or rasterizer.BLOCK_SIZE
+    yield rasterizer.render(game, size)
+    for code in episode.actions:
+        game.move_player(ACTIONS[code])
+        game.update()
+        yield rasterizer.render(game, size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traces de episódios do Block Picker.")
+    parser.add_argument("comando", choices=("resumo", "verificar", "video"))
+    parser.add_argument("arquivo")
+    parser.add_argument("--episodio", type=int, default=0)
+    parser.add_argument("--saida", default="episodio.gif")
+    parser.add_argument("--bloco", type=int, default=20, help="tamanho do bloco em pixels no vídeo")
+    parser.add_argument("--ms-por-quadro", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.comando == "resumo":
+        count = steps = score = 0
+        for ep in read_trace(args.arquivo):
+            count += 1
+            steps += len(ep.actions)
+            score += ep.score
+        print(f"{count} episódios, {steps} passos, {score} recompensas")
+    elif args.comando == "verificar":
+        t = time.perf_counter()
+        count = steps = wrong = 0
+        for ep, score, _ in replay(read_trace(args.arquivo)):
+            count += 1
+            steps += len(ep.actions)
+            if score != ep.score:
+                wrong += 1
+        elapsed = time.perf_counter() - t
+        print(f"{count} episódios, {steps} passos em {elapsed:.2f}s ({steps / max(elapsed, 1e-9):,.0f} passos/s); "
+              f"{wrong} com pontuação diferente da gravada")
+    else:
+        from PIL import Image as PILImage
+        for k, ep in enumerate(read_trace(args.arquivo)):
+            if k == args.episodio:
+                images = [PILImage.fromarray(frame) for frame in frames(ep, args.bloco)]
+                images[0].save(args.saida, save_all=True, append_images=images[1:], duration=args.ms_por_quadro, loop=0)
+                print(f"{len(images)} quadros gravados em {args.saida}")
+                break
+        else:
+            print(f"O arquivo não tem o episódio {args.episodio}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Avaliação de uma política em muitos episódios, espalhados por vários processos.
+
+Cada episódio é um par (mapa, seed). Os episódios são divididos em lotes e
+cada lote roda inteiro num processo do pool, com o seu próprio engine.Game
+(reaproveitado entre episódios). O processo devolve só os totais por mapa do
+lote, e o processo principal soma os totais: a comunicação entre processos é
+pequena e o tempo cresce quase linear com o número de núcleos.
+
+A política é uma função policy(game, rng) -> direção. Já existem
+"aleatoria" e "planejador" (caminho mais curto com planner.path); outras
+podem ser passadas como "modulo:funcao".
+
+Para avaliar em mapas gerados, grave um pacote com map_generator.py e passe
+--mapas-arquivo (ou BLOCK_PICKER_MAPAS).
+
+Uso:
+  python evaluate.py --politica planejador --seeds 200
+  python evaluate.py --politica aleatoria --seeds 1000 --max-passos 300 --processos 8 --saida aval.json
+  python evaluate.py --curriculo
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def aleatoria(game, rng):
+    return rng.choice(("up", "down", "left", "right"))
+
+
+def planejador(game, rng):
+    import planner
+    moves = planner.path(game.map_layout, game.player_pos, game.block_pos)
+    return moves[0] if moves else aleatoria(game, rng)
+
+
+POLITICAS = {"aleatoria": aleatoria, "planejador": planejador}
+
+
+def load_policy(name):
+    if name in POLITICAS:
+        return POLITICAS[name]
+    module, _, func = name.partition(":")
+    if not func:
+        raise ValueError(f"Política inválida: {name}. Use {', '.join(POLITICAS)} ou modulo:funcao.")
+    return getattr(importlib.import_module(module), func)
+
+
+# Estado de cada processo do pool
+_worker_game = None
+_worker_policies = {}
+
+
+def _new_totals():
+    return {"episodios": 0, "sucessos": 0, "passos": 0, "passos_min": None, "passos_max": 0, "pontuacao": 0}
+
+
+def run_episodes(policy_name, tasks, max_passos):
+    """Roda os episódios (mapa, seed) e devolve {mapa: totais}."""
+    global _worker_game
+    import engine
+    policy = _worker_policies.get(policy_name)
+    if policy is None:
+        policy = _worker_policies[policy_name] = load_policy(policy_name)
+    totals = {}
+    for map_idx, seed in tasks:
+        if _worker_game is None:
+            _worker_game = engine.Game(map_idx, seed=seed)
+        else:
+            _worker_game.rng.seed(seed)
+            _worker_game.reset(map_idx)
+        game = _worker_game
+        game.start()
+        rng = random.Random(seed)
+        steps = 0
+        done = False
+        while steps < max_passos and not done:
+            _, _, done = game.step(policy(game, rng))
+            steps += 1
+        t = totals.setdefault(map_idx, _new_totals())
+        t["episodios"] += 1
+        t["pontuacao"] += game.score
+        if done:
+            t["sucessos"] += 1
+            t["passos"] += steps
+            t["passos_min"] = steps if t["passos_min"] is None else min(t["passos_min"], steps)
+            t["passos_max"] = max(t["passos_max"], steps)
+    return totals
+
+
+def run_curriculum(policy_name, seed=0, max_passos=500):
+    """Joga todos os mapas de MAPS em sequência, sem tempo de transição.
+
+    Usa o modo sequencial do engine com transition_delay = 0: ao pegar a
+    recompensa o jogo já está no mapa seguinte. Retorna os passos gastos em
+    cada mapa (None no mapa em que estourou max_passos, que encerra o currículo).
+    """
+    import engine
+    policy = load_policy(policy_name)
+    rng = random.Random(seed)
+    game = engine.Game(0, seed=seed)
+    game.transition_delay = 0
+    game.sequencial_mode = True
+    game.start()
+    steps = []
+    while True:
+        map_idx = game.map_idx
+        for n in range(1, max_passos + 1):
+            game.move_player(policy(game, rng))
+            if game.update():
+                steps.append(n)
+                break
+        else:
+            steps.append(None)
+            return steps
+        if map_idx == len(engine.MAPS) - 1 or not game.started:
+            return steps
+
+
+def merge(into, totals):
+    for map_idx, t in totals.items():
+        acc = into.setdefault(map_idx, _new_totals())
+        for key in ("episodios", "sucessos", "passos", "pontuacao"):
+            acc[key] += t[key]
+        acc["passos_max"] = max(acc["passos_max"], t["passos_max"])
+        if t["passos_min"] is not None:
+            acc["passos_min"] = t["passos_min"] if acc["passos_min"] is None else min(acc["passos_min"], t["passos_min"])
+    return into
+
+
+def summary(totals):
+    """Taxa de sucesso, média de passos até a recompensa e pontuação média por mapa."""
+    result = {}
+    for map_idx in sorted(totals):
+        t = totals[map_idx]
+        result[map_idx] = dict(
+            t,
+            taxa_sucesso=t["sucessos"] / t["episodios"] if t["episodios"] else 0.0,
+            passos_medio=t["passos"] / t["sucessos"] if t["sucessos"] else None,
+            pontuacao_media=t["pontuacao"] / t["episodios"] if t["episodios"] else 0.0,
+        )
+    return result
+
+
+def evaluate(policy_name, map_indices, seeds, max_passos=500, processos=None, lote=None):
+    """Avalia a política em todo (mapa, seed) e devolve summary() dos totais.
+
+    processos=1 roda tudo no processo atual (útil para depurar a política).
+    """
+    tasks = [(map_idx, seed) for seed in seeds for map_idx in map_indices]
+    processos = processos or os.cpu_count() or 1
+    if lote is None:
+        # Uns 4 lotes por processo: equilibra a carga sem multiplicar a comunicação
+        lote = max(1, len(tasks) // (processos * 4))
+    batches = [tasks[i:i + lote] for i in range(0, len(tasks), lote)]
+    totals = {}
+    if processos == 1:
+        for batch in batches:
+            merge(totals, run_episodes(policy_name, batch, max_passos))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            futures = [pool.submit(run_episodes, policy_name, batch, max_passos) for batch in batches]
+            for future in futures:
+                merge(totals, future.result())
+    return summary(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia uma política do Block Picker em vários processos.")
+    parser.add_argument("--politica", default="planejador", help="aleatoria, planejador ou modulo:funcao")
+    parser.add_argument("--mapas", default=None, help="índices separados por vírgula (padrão: todos)")
+    parser.add_argument("--mapas-arquivo", default=None, help="diretório ou pacote de mapas (BLOCK_PICKER_MAPAS)")
+    parser.add_argument("--seeds", type=int, default=100, help="episódios por mapa")
+    parser.add_argument("--max-passos", type=int, default=500)
+    parser.add_argument("--processos", type=int, default=None, help="padrão: número de núcleos")
+    parser.add_argument("--saida", default=None, help="grava o resultado neste JSON")
+    parser.add_argument("--curriculo", action="store_true", help="joga todos os mapas em sequência, como o modo sequencial")
+    args = parser.parse_args()
+
+    if args.mapas_arquivo:
+        # Antes de importar game_maps; os processos do pool herdam a variável
+        os.environ["BLOCK_PICKER_MAPAS"] = args.mapas_arquivo
+    from game_maps import MAPS
+    if args.curriculo:
+        t = time.perf_counter()
+        steps = run_curriculum(args.politica, max_passos=args.max_passos)
+        elapsed = time.perf_counter() - t
+        for map_idx, n in enumerate(steps):
+            print(f"{map_idx:5d} {MAPS.name(map_idx)[:20]:20s} " + (f"{n} passos" if n is not None else "não terminou"))
+        print(f"Currículo de {len(steps)} mapas em {elapsed * 1000:.1f} ms")
+        return
+    if args.mapas:
+        map_indices = [int(i) for i in args.mapas.split(",")]
+    else:
+        map_indices = list(range(len(MAPS)))
+
+    t = time.perf_counter()
+    result = evaluate(args.politica, map_indices, range(args.seeds), args.max_passos, args.processos)
+    elapsed = time.perf_counter() - t
+    episodes = sum(r["episodios"] for r in result.values())
+    for map_idx, r in result.items():
+        passos = f"{r['passos_medio']:.1f}" if r["passos_medio"] is not None else "-"
+        print(f"{map_idx:5d} {MAPS.name(map_idx)[:20]:20s} sucesso {r['taxa_sucesso']:6.1%}  "
+              f"passos médios {passos:>8s}  pontuação média {r['pontuacao_media']:.2f}")
+    print(f"{episodes} episódios em {elapsed:.2f}s ({episodes / max(elapsed, 1e-9):.0f} episódios/s)")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"politica": args.politica, "max_passos": args.max_passos, "mapas": result}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
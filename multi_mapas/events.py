@@ -0,0 +1,73 @@
+"""Fila de eventos de mudança de estado de um jogo.
+
+O Game publica um evento pequeno a cada mudança (movimento, recompensa,
+reinício, troca de tela) e quem acompanha o jogo espera por eventos novos a
+partir de um cursor, em vez de ficar pedindo o mapa e a pontuação.
+Só os últimos maxlen eventos ficam guardados.
+
+As ferramentas async do MCP esperam com wait_async(): cada espera é um
+asyncio.Event acordado por publish() via call_soon_threadsafe, então nenhuma
+thread fica parada esperando, não importa quantos clientes acompanham o jogo.
+"""
+import asyncio
+import threading
+from collections import deque
+from itertools import islice
+
+
+class EventLog:
+    def __init__(self, maxlen=1024):
+        self._events = deque(maxlen=maxlen)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # (loop, asyncio.Event) de cada wait_async em andamento
+        self._waiters = set()
+
+    @property
+    def last_id(self):
+        return self._next_id - 1
+
+    def publish(self, tipo, **data):
+        with self._lock:
+            event = {"id": self._next_id, "tipo": tipo}
+            event.update(data)
+            self._events.append(event)
+            self._next_id += 1
+            for loop, waiter in self._waiters:
+                try:
+                    loop.call_soon_threadsafe(waiter.set)
+                except RuntimeError:
+                    pass  # loop já fechado
+        return event
+
+    def since(self, cursor):
+        """Eventos com id maior que cursor e se algum deles já saiu da fila (perdido)."""
+        with self._lock:
+            if not self._events:
+                return [], False
+            first = self._events[0]["id"]
+            lost = cursor < first - 1
+            start = max(0, cursor - first + 1)
+            return list(islice(self._events, start, None)), lost
+
+    async def wait_async(self, cursor, timeout):
+        """Como since(), mas espera até timeout segundos por um evento depois de cursor.
+
+        Roda no loop de eventos, sem ocupar uma thread.
+        """
+        waiter = asyncio.Event()
+        entry = (asyncio.get_running_loop(), waiter)
+        with self._lock:
+            ready = self._next_id - 1 > cursor
+            if not ready:
+                self._waiters.add(entry)
+        if ready:
+            return self.since(cursor)
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+        return self.since(cursor)
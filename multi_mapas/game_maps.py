@@ -1,68 +1,12 @@
-MAPS = [
-    {
-        "name": "Simples",
-        "layout": [
-            "###########",
-            "#OPOOOOOOR#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "###########",
-        ]
-    },
-    {
-        "name": "Sorriso",
-        "layout": [
-            "###########",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OOOPOOOOO#",
-            "#OOOOOOOOO#",
-            "#OO#OOO#OO#",
-            "#OOO###OOO#",
-            "#OOOOOROOO#",
-            "#OOOOOOOOO#",
-            "#OOOOOOOOO#",
-            "###########",
-        ]
-    },
-    {
-        "name": "Labirinto",
-        "layout": [
-            "###########",
-            "#POOOOOOOO#",
-            "#OOOOOOOOO#",
-            "#OO#OOO#OO#",
-            "#OO#OOO#OO#",
-            "####OOO#OO#",
-            "#OOOOOO#OO#",
-            "#OOOOOO#OO#",
-            "########OO#",
-            "#OOOOOOOOO#",
-            "#ROOOOOOOO#",
-            "###########",
-        ]
-    },
-    {
-        "name": "Barreira",
-        "layout": [
-            "#############",
-            "#OOOOOOOOOOO#",
-            "#OOOOOOOOOOO#",
-            "#OO##OOO##OO#",
-            "#OO#OOOOO#OO#",
-            "#OO#OOOOO#OO#",
-            "#OO#OOPOO#OO#",
-            "#OO#OOOOO#OO#",
-            "#OO#######OO#",
-            "#OOOOOOOOOOO#",
-            "#OOOOOROOOOO#",
-            "#############",
-        ]
-    },
-]
+"""Lista de mapas do jogo.
+
+Os mapas ficam em arquivos no diretório mapas/ (veja map_loader.py) e só são
+lidos quando usados. Para usar outro diretório ou um pacote .jsonl, defina a
+variável de ambiente BLOCK_PICKER_MAPAS antes de iniciar.
+"""
+import os
+from map_loader import MapPack
+
+MAPS_DIR = os.environ.get("BLOCK_PICKER_MAPAS") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapas")
+
+MAPS = MapPack(MAPS_DIR)
@@ -0,0 +1,111 @@
+"""Ambiente Gymnasium do Block Picker, com as mesmas regras do servidor MCP.
+
+BlockPickerEnv usa o engine.Game (move_player + update, recompensa 1 ao pegar
+o bloco, episódio termina ao pegar). A observação é um array uint8
+(3, altura, largura) com os canais parede, jogador e recompensa; com vários
+mapas, os menores são completados com parede até o tamanho do maior. As
+ações são os índices de ACTIONS (up, down, left, right).
+
+make_vector_env() roda várias cópias em subprocessos com o AsyncVectorEnv do
+Gymnasium em modo shared_memory: cada processo escreve a observação direto
+num buffer compartilhado e só as recompensas e flags passam por pipe, então
+nenhuma observação é serializada.
+"""
+from functools import partial
+import numpy as np  # pip install numpy
+import gymnasium as gym  # pip install gymnasium
+from gymnasium import spaces
+from engine import DIRECTIONS, Game, load_map
+from game_maps import MAPS
+
+ACTIONS = list(DIRECTIONS)
+WALL, PLAYER, REWARD = range(3)
+
+
+class BlockPickerEnv(gym.Env):
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 10}
+
+    def __init__(self, maps=None, max_steps=500, render_mode=None, block_size=20):
+        """maps: índice ou lista de índices de MAPS (padrão: todos); no reset um deles é sorteado."""
+        if maps is None:
+            maps = range(len(MAPS))
+        elif isinstance(maps, int):
+            maps = [maps]
+        self.maps = list(maps)
+        self.max_steps = max_steps
+        self.render_mode = render_mode
+        self.block_size = block_size
+        layouts = [load_map(i) for i in self.maps]
+        self.rows = max(layout.rows for layout in layouts)
+        self.cols = max(layout.cols for layout in layouts)
+        # Canal de paredes pronto de cada mapa; o reset só copia
+        self._walls = {}
+        for map_idx in self.maps:
+            self._pad_walls(map_idx)
+        self.observation_space = spaces.Box(0, 1, shape=(3, self.rows, self.cols), dtype=np.uint8)
+        self.action_space = spaces.Discrete(len(ACTIONS))
+        self.game = None
+        self.steps = 0
+        self._obs = np.zeros(self.observation_space.shape, dtype=np.uint8)
+
+    def reset(self, seed=None, options=None):
+        """options pode ter "map_idx" para escolher o mapa em vez de sortear."""
+        super().reset(seed=seed)
+        options = options or {}
+        map_idx = options.get("map_idx")
+        if map_idx is None:
+            map_idx = self.maps[int(self.np_random.integers(len(self.maps)))]
+        game_seed = int(self.np_random.integers(2 ** 63))
+        if self.game is None:
+            self.game = Game(map_idx, seed=game_seed)
+        else:
+            self.game.rng.seed(game_seed)
+            self.game.reset(map_idx)
+        self.game.start()
+        self.steps = 0
+        self._obs[WALL] = self._walls[map_idx] if map_idx in self._walls else self._pad_walls(map_idx)
+        self._obs[PLAYER] = 0
+        self._obs[REWARD] = 0
+        self._mark()
+        return self._obs.copy(), self._info()
+
+    def step(self, action):
+        game = self.game
+        px, py = game.player_pos
+        game.move_player(ACTIONS[int(action)])
+        picked = game.update()
+        self.steps += 1
+        self._obs[PLAYER, py, px] = 0
+        self._mark()
+        truncated = not picked and self.steps >= self.max_steps
+        return self._obs.copy(), float(picked), picked, truncated, self._info()
+
+    def _mark(self):
+        px, py = self.game.player_pos
+        bx, by = self.game.block_pos
+        self._obs[PLAYER, py, px] = 1
+        self._obs[REWARD, by, bx] = 1
+
+    def _pad_walls(self, map_idx):
+        layout = load_map(map_idx)
+        if layout.rows > self.rows or layout.cols > self.cols:
+            raise ValueError(f"O mapa {map_idx} é maior que o espaço de observação ({self.rows}x{self.cols}).")
+        walls = np.ones((self.rows, self.cols), dtype=np.uint8)
+        walls[:layout.rows, :layout.cols] = np.frombuffer(layout.walls, dtype=np.uint8).reshape(layout.rows, layout.cols)
+        self._walls[map_idx] = walls
+        return walls
+
+    def _info(self):
+        return {"map_idx": self.game.map_idx, "score": self.game.score}
+
+    def render(self):
+        if self.render_mode == "rgb_array":
+            import rasterizer
+            return rasterizer.render(self.game, self.block_size)
+        return None
+
+
+def make_vector_env(num_envs, maps=None, max_steps=500, shared_memory=True, **kwargs):
+    """num_envs cópias do BlockPickerEnv em subprocessos (gymnasium.vector.AsyncVectorEnv)."""
+    env_fn = partial(BlockPickerEnv, maps=maps, max_steps=max_steps)
+    return gym.vector.AsyncVectorEnv([env_fn] * num_envs, shared_memory=shared_memory, **kwargs)
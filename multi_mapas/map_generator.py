@@ -0,0 +1,215 @@
+"""Gerador de mapas aleatórios, sempre com caminho de P até R.
+
+generate() devolve um layout no mesmo formato dos mapas em mapas/ (linhas de
+'#', 'O', 'P' e 'R', com borda de parede), de qualquer tamanho. Estilos:
+  aleatorio  paredes soltas com a densidade pedida
+  labirinto  labirinto perfeito (backtracking), corredores de uma célula
+  salas      salas ligadas por portas (divisão recursiva)
+densidade é a fração das células livres que viram obstáculo depois do estilo
+(padrão 0.25 em aleatorio e 0 nos outros). R é sorteado entre as células que
+uma BFS a partir de P alcança; se os obstáculos fecharem P, um corredor em L é
+aberto até outra célula, então o mapa sempre tem solução.
+
+A grade é um bytearray com os próprios caracteres, então um mapa de
+2000x2000 ocupa 4 MB enquanto é gerado.
+
+Uso:
+  python map_generator.py 40 20 --estilo labirinto --seed 1
+  python map_generator.py 200 200 --estilo salas --quantidade 1000 --saida pacote.jsonl
+"""
+import argparse
+import random
+from array import array
+from collections import deque
+
+ESTILOS = ("aleatorio", "labirinto", "salas")
+WALL = ord('#')
+OPEN = ord('O')
+SALA_MIN = 8
+
+
+def _reachable(grid, width, start):
+    """Índices das células livres alcançáveis a partir de start (BFS)."""
+    seen = bytearray(len(grid))
+    seen[start] = 1
+    queue = deque([start])
+    found = array('q', [start])
+    while queue:
+        i = queue.popleft()
+        for j in (i - 1, i + 1, i - width, i + width):
+            if not seen[j] and grid[j] == OPEN:
+                seen[j] = 1
+                queue.append(j)
+                found.append(j)
+    return found
+
+
+def _maze(grid, width, height, rng):
+    # Células nas coordenadas ímpares; as paredes entre elas são abertas pelo caminho
+    start = width + 1
+    grid[start] = OPEN
+    stack = [start]
+    steps = (2, -2, 2 * width, -2 * width)
+    while stack:
+        i = stack[-1]
+        y, x = divmod(i, width)
+        options = []
+        for d in steps:
+            j = i + d
+            jy, jx = divmod(j, width)
+            if 1 <= jx < width - 1 and 1 <= jy < height - 1 and (jx == x or jy == y) and grid[j] == WALL:
+                options.append(j)
+        if not options:
+            stack.pop()
+            continue
+        j = rng.choice(options)
+        grid[(i + j) // 2] = OPEN
+        grid[j] = OPEN
+        stack.append(j)
+
+
+def _rooms(grid, width, height, rng):
+    # Paredes em coordenadas pares, portas em ímpares: uma parede nova nunca tapa
+    # a porta de outra
+    for y in range(1, height - 1):
+        grid[y * width + 1:y * width + width - 1] = bytes([OPEN]) * (width - 2)
+    regions = [(1, 1, width - 2, height - 2)]
+    while regions:
+        x0, y0, x1, y1 = regions.pop()
+        w, h = x1 - x0 + 1, y1 - y0 + 1
+        if w < SALA_MIN and h < SALA_MIN:
+            continue
+        if w >= h:
+            walls = [x for x in range(x0 + 1, x1) if x % 2 == 0]
+            if not walls:
+                continue
+            wx = rng.choice(walls)
+            door = rng.choice(range(y0, y1 + 1, 2))
+            for y in range(y0, y1 + 1):
+                if y != door:
+                    grid[y * width + wx] = WALL
+            regions += [(x0, y0, wx - 1, y1), (wx + 1, y0, x1, y1)]
+        else:
+            walls = [y for y in range(y0 + 1, y1) if y % 2 == 0]
+            if not walls:
+                continue
+            wy = rng.choice(walls)
+            door = rng.choice(range(x0, x1 + 1, 2))
+            for x in range(x0, x1 + 1):
+                if x != door:
+                    grid[wy * width + x] = WALL
+            regions += [(x0, y0, x1, wy - 1), (x0, wy + 1, x1, y1)]
+
+
+def _random_interior(width, height, rng, exclude=None):
+    while True:
+        i = rng.randrange(1, height - 1) * width + rng.randrange(1, width - 1)
+        if i != exclude:
+            return i
+
+
+def _random_open(grid, width, height, rng):
+    """Célula livre sorteada; se não sobrou nenhuma, abre uma."""
+    for _ in range(100):
+        i = _random_interior(width, height, rng)
+        if grid[i] == OPEN:
+            return i
+    # Mapa quase todo fechado: a próxima célula livre depois de um ponto sorteado
+    start = _random_interior(width, height, rng)
+    i = grid.find(OPEN, start)
+    if i < 0:
+        i = grid.find(OPEN)
+    if i < 0:
+        i = start
+        grid[i] = OPEN
+    return i
+
+
+def _carve(grid, width, a, b):
+    """Abre um corredor em L de a até b (índices)."""
+    ay, ax = divmod(a, width)
+    by, bx = divmod(b, width)
+    step = 1 if bx >= ax else -1
+    for x in range(ax, bx + step, step):
+        grid[ay * width + x] = OPEN
+    step = 1 if by >= ay else -1
+    for y in range(ay, by + step, step):
+        grid[y * width + bx] = OPEN
+
+
+def generate(width, height, densidade=None, estilo="aleatorio", seed=None):
+    """Layout (lista de strings) width x height, com borda, P e R ligados."""
+    if estilo not in ESTILOS:
+        raise ValueError(f"Estilo inválido: {estilo}. Use: {', '.join(ESTILOS)}.")
+    if width < 3 or height < 3 or (width - 2) * (height - 2) < 2:
+        raise ValueError("O mapa precisa de pelo menos duas células livres dentro da borda.")
+    if densidade is None:
+        densidade = 0.25 if estilo == "aleatorio" else 0.0
+    if not 0.0 <= densidade < 1.0:
+        raise ValueError("densidade deve estar em [0, 1).")
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+
+    grid = bytearray([WALL]) * (width * height)
+    if estilo == "labirinto":
+        _maze(grid, width, height, rng)
+    elif estilo == "salas":
+        _rooms(grid, width, height, rng)
+    else:
+        for y in range(1, height - 1):
+            grid[y * width + 1:y * width + width - 1] = bytes([OPEN]) * (width - 2)
+
+    if densidade:
+        for i in range(width + 1, width * (height - 1) - 1):
+            if grid[i] == OPEN and rng.random() < densidade:
+                grid[i] = WALL
+
+    player = _random_open(grid, width, height, rng)
+    reachable = _reachable(grid, width, player)
+    if len(reachable) > 1:
+        reward = reachable[rng.randrange(1, len(reachable))]
+    else:
+        # P ficou fechado: abre caminho até outra célula qualquer de dentro
+        grid[player] = WALL
+        reward = _random_open(grid, width, height, rng)
+        grid[player] = OPEN
+        if reward == player:
+            reward = _random_interior(width, height, rng, exclude=player)
+        _carve(grid, width, player, reward)
+    grid[player] = ord('P')
+    grid[reward] = ord('R')
+    return [grid[y * width:(y + 1) * width].decode("ascii") for y in range(height)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera mapas para o Block Picker.")
+    parser.add_argument("largura", type=int)
+    parser.add_argument("altura", type=int)
+    parser.add_argument("--estilo", choices=ESTILOS, default="aleatorio")
+    parser.add_argument("--densidade", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quantidade", type=int, default=1, help="mais de um mapa grava um pacote .jsonl")
+    parser.add_argument("--saida", default=None, help="arquivo .txt (um mapa) ou .jsonl (pacote)")
+    args = parser.parse_args()
+
+    if args.quantidade > 1 and not (args.saida or "").endswith(".jsonl"):
+        parser.error("mais de um mapa só pode ser gravado em um pacote .jsonl (--saida arquivo.jsonl)")
+    rng = random.Random(args.seed)
+    maps = [
+        {"name": f"{args.estilo} {args.largura}x{args.altura} #{n + 1}",
+         "layout": generate(args.largura, args.altura, args.densidade, args.estilo, rng)}
+        for n in range(args.quantidade)
+    ]
+    if args.saida and args.saida.endswith(".jsonl"):
+        from map_loader import pack
+        pack(maps, args.saida)
+    else:
+        text = f"nome: {maps[0]['name']}\n" + "\n".join(maps[0]["layout"]) + "\n"
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Mapas lidos de arquivos, sob demanda.
+
+Um MapPack aponta para um diretório (ou um único arquivo) e se comporta como a
+antiga lista MAPS: MAPS[i] devolve {"name": ..., "layout": (...)} e len(MAPS)
+é o número de mapas. Na criação nada é lido; a primeira consulta só lista os
+arquivos (e as posições das linhas dos .jsonl), e cada mapa é lido e validado
+toda vez que é pedido; quem usa o mesmo mapa várias vezes guarda o
+resultado (o layout já processado fica no cache limitado de engine.load_map).
+Só os nomes ficam guardados aqui: name(i) serve às listas de mapas sem reler
+o arquivo a cada desenho.
+
+Formatos aceitos, em ordem alfabética do nome do arquivo:
+  .txt    uma linha por linha do mapa; a primeira pode ser "nome: Fulano"
+  .json   {"name": "Fulano", "layout": ["###", ...]}
+  .jsonl  pacote com um mapa json por linha (para milhares de fases)
+
+Uso para empacotar um diretório:
+  python map_loader.py mapas/ pacote.jsonl
+"""
+import json
+import os
+import sys
+import threading
+
+EXTENSOES = (".txt", ".json", ".jsonl")
+CELULAS = set("#OPR")
+
+
+def _default_name(path):
+    # "03_labirinto.txt" -> "labirinto"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    prefix, _, rest = stem.partition("_")
+    return rest if prefix.isdigit() and rest else stem
+
+
+def _validate(entry, origem):
+    layout = tuple(entry.get("layout") or ())
+    if not layout:
+        raise ValueError(f"{origem}: mapa sem layout")
+    if any(len(row) != len(layout[0]) for row in layout):
+        raise ValueError(f"{origem}: linhas com tamanhos diferentes")
+    invalid = set("".join(layout)) - CELULAS
+    if invalid:
+        raise ValueError(f"{origem}: células inválidas {''.join(sorted(invalid))!r}")
+    return {"name": str(entry.get("name") or "sem nome"), "layout": layout}
+
+
+def parse_text(text, name="sem nome"):
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if lines and lines[0].lower().startswith("nome:"):
+        name = lines.pop(0)[5:].strip()
+    return {"name": name, "layout": lines}
+
+
+class MapPack:
+    def __init__(self, path):
+        self.path = path
+        # Lista de (arquivo, offset); offset é None para .txt/.json
+        self._entries = None
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def _index(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    if os.path.isdir(self.path):
+                        files = [os.path.join(self.path, f) for f in sorted(os.listdir(self.path))]
+                    else:
+                        files = [self.path]
+                    entries = []
+                    for f in files:
+                        if f.endswith(".jsonl"):
+                            entries.extend((f, offset) for offset in self._line_offsets(f))
+                        elif f.endswith(EXTENSOES):
+                            entries.append((f, None))
+                    self._entries = entries
+        return self._entries
+
+    @staticmethod
+    def _line_offsets(path):
+        offsets = []
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    def _read(self, path, offset):
+        if offset is not None:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                entry = json.loads(f.readline())
+            return _validate(entry, f"{path}@{offset}")
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".json"):
+                entry = json.load(f)
+                entry.setdefault("name", _default_name(path))
+            else:
+                entry = parse_text(f.read(), _default_name(path))
+        return _validate(entry, path)
+
+    def __len__(self):
+        return len(self._index())
+
+    def __getitem__(self, map_idx):
+        entries = self._index()
+        if map_idx < 0:
+            map_idx += len(entries)
+        if not 0 <= map_idx < len(entries):
+            raise IndexError(f"mapa {map_idx} não existe ({len(entries)} mapas)")
+        entry = self._read(*entries[map_idx])
+        self._names[map_idx] = entry["name"]
+        return entry
+
+    def name(self, map_idx):
+        """Nome do mapa; só lê o arquivo na primeira vez."""
+        if map_idx < 0:
+            map_idx += len(self)
+        name = self._names.get(map_idx)
+        if name is None:
+            name = self[map_idx]["name"]
+        return name
+
+    def __iter__(self):
+        for map_idx in range(len(self)):
+            yield self[map_idx]
+
+
+def pack(maps, output):
+    """Grava os mapas (qualquer sequência como MAPS) num pacote .jsonl."""
+    with open(output, "w", encoding="utf-8") as f:
+        for entry in maps:
+            f.write(json.dumps({"name": entry["name"], "layout": list(entry["layout"])}, ensure_ascii=False))
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("uso: python map_loader.py <diretório ou arquivo> <saida.jsonl>")
+    maps = MapPack(sys.argv[1])
+    pack(maps, sys.argv[2])
+    print(f"{len(maps)} mapas gravados em {sys.argv[2]}")
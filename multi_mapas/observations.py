@@ -0,0 +1,89 @@
+"""Formatos compactos de observação para as ferramentas do MCP."""
+import base64
+import json
+from functools import lru_cache
+
+
+def run_length(row):
+    """Codifica uma linha do mapa como contagem + caractere: '###OOP' -> '3#2O1P'."""
+    out = []
+    i = 0
+    while i < len(row):
+        j = i
+        while j < len(row) and row[j] == row[i]:
+            j += 1
+        out.append(f"{j - i}{row[i]}")
+        i = j
+    return ''.join(out)
+
+
+def view_cells(origin, rows):
+    """Células de uma janela como {(x, y): caractere}, em coordenadas do mapa."""
+    x0, y0 = origin
+    return {(x0 + dx, y0 + dy): cell for dy, row in enumerate(rows) for dx, cell in enumerate(row)}
+
+
+def view_diff(old_cells, new_cells):
+    """Células de new_cells que são novas ou mudaram em relação a old_cells, em ordem (y, x)."""
+    changed = [(pos, cell) for pos, cell in new_cells.items() if old_cells.get(pos) != cell]
+    changed.sort(key=lambda item: (item[0][1], item[0][0]))
+    return changed
+
+
+# Formatos estruturados (json/bits): o layout é fixo durante o jogo, então a
+# máscara de paredes de cada layout é codificada uma vez só
+_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+@lru_cache(maxsize=64)
+def wall_runs(layout):
+    """Máscara de paredes (linha por linha, y * cols + x) como tamanhos de trechos alternados.
+
+    O primeiro trecho é de células livres (pode ser 0): [livres, paredes, livres, ...].
+    """
+    runs = []
+    current, count = 0, 0
+    for cell in layout.walls:
+        if cell == current:
+            count += 1
+        else:
+            runs.append(count)
+            current, count = cell, 1
+    runs.append(count)
+    return runs
+
+
+@lru_cache(maxsize=64)
+def wall_bits(layout):
+    """Máscara de paredes em base64, 1 bit por célula (1 = parede), bit mais alto primeiro."""
+    n = len(layout.walls)
+    pad = -n % 8
+    digits = layout.walls.translate(_TO_DIGITS) + b'0' * pad
+    packed = int(digits, 2).to_bytes((n + pad) // 8, 'big') if n else b''
+    return base64.b64encode(packed).decode('ascii')
+
+
+def map_state(game, paredes="rle"):
+    """Estado do jogo como dict pronto para json.dumps.
+
+    paredes: 'rle' (wall_runs), 'bits' (wall_bits) ou None para não incluir a
+    máscara (o cliente que já tem a do mapa atual economiza o resto).
+    """
+    state = {
+        "estado": game.estado,
+        "mapa": game.map_idx,
+        "largura": game.cols,
+        "altura": game.rows,
+        "jogador": list(game.player_pos),
+        "recompensa": list(game.block_pos),
+        "pontuacao": game.score,
+    }
+    if paredes == "rle":
+        state["paredes"] = {"codificacao": "rle", "dados": wall_runs(game.layout)}
+    elif paredes == "bits":
+        state["paredes"] = {"codificacao": "bits", "dados": wall_bits(game.layout)}
+    return state
+
+
+def to_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
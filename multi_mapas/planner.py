@@ -0,0 +1,140 @@
+"""Planejamento de caminhos por BFS com campos de distância em cache.
+
+Para cada destino é calculado uma vez o campo de distâncias (BFS a partir do
+destino) sobre o layout limpo. Com o campo pronto, distance() é O(1) e path()
+é O(tamanho do caminho): basta descer pelas células com distância menor.
+Os campos ficam em cache por (layout, destino); quando random_block move a
+recompensa o novo destino simplesmente ganha o seu próprio campo.
+
+Cada campo é um array('i') (4 bytes por célula) e o cache é limitado pelo
+total de células guardadas, não pelo número de campos: em mapas grandes
+cabem poucos campos, em mapas pequenos cabem muitos.
+"""
+import threading
+from array import array
+from collections import OrderedDict, deque
+from engine import DIRECTIONS, load_map
+from game_maps import MAPS
+
+# Soma das células de todos os campos em cache (32M células = 128 MB)
+MAX_CACHE_CELLS = 32_000_000
+
+_fields = OrderedDict()
+_cached_cells = 0
+_fields_lock = threading.Lock()
+
+
+def _bfs(layout, target):
+    rows, cols = len(layout), len(layout[0])
+    cells = ''.join(layout)
+    dist = array('i', [-1]) * (rows * cols)
+    tx, ty = target
+    if not (0 <= tx < cols and 0 <= ty < rows) or cells[ty * cols + tx] != 'O':
+        return dist
+    start = ty * cols + tx
+    dist[start] = 0
+    queue = deque([start])
+    last = rows * cols
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        x = i % cols
+        for j in (i - cols, i + cols, i - 1 if x > 0 else -1, i + 1 if x < cols - 1 else -1):
+            if 0 <= j < last and dist[j] < 0 and cells[j] == 'O':
+                dist[j] = d
+                queue.append(j)
+    return dist
+
+
+def distance_field(layout, target):
+    """Distâncias (em passos) de cada célula até target; -1 quando não alcança.
+
+    layout é uma tupla de strings já limpa ('#' e 'O'); o resultado é um
+    array('i') indexado por y * cols + x (não altere: ele fica no cache).
+    """
+    global _cached_cells
+    key = (layout, tuple(target))
+    with _fields_lock:
+        dist = _fields.get(key)
+        if dist is not None:
+            _fields.move_to_end(key)
+            return dist
+    dist = _bfs(layout, target)
+    with _fields_lock:
+        if key not in _fields:
+            _fields[key] = dist
+            _cached_cells += len(dist)
+        # Tira os menos usados até caber; o campo recém-calculado sempre fica
+        while _cached_cells > MAX_CACHE_CELLS and len(_fields) > 1:
+            _, old = _fields.popitem(last=False)
+            _cached_cells -= len(old)
+    return dist
+
+
+def is_cached(layout, target):
+    """True se o campo de target já está pronto (distance e path não vão fazer BFS)."""
+    return (tuple(layout), tuple(target)) in _fields
+
+
+def clear_cache():
+    global _cached_cells
+    with _fields_lock:
+        _fields.clear()
+        _cached_cells = 0
+
+
+def as_point(p):
+    """(x, y) de uma coordenada [x, y]; ValueError se não for um par de inteiros."""
+    if not isinstance(p, (list, tuple)) or len(p) != 2 or not all(isinstance(v, int) for v in p):
+        raise ValueError(f"Coordenada inválida: {p!r}. Use [x, y] com inteiros.")
+    return tuple(p)
+
+
+def distance(layout, origin, target):
+    """Número de passos de origin até target, ou None se não há caminho."""
+    layout = tuple(layout)
+    ox, oy = as_point(origin)
+    target = as_point(target)
+    cols = len(layout[0])
+    if not (0 <= ox < cols and 0 <= oy < len(layout)):
+        return None
+    d = distance_field(layout, target)[oy * cols + ox]
+    return d if d >= 0 else None
+
+
+def path(layout, origin, target):
+    """Lista de direções (chaves de DIRECTIONS) de origin até target, ou None."""
+    layout = tuple(layout)
+    if distance(layout, origin, target) is None:
+        return None
+    rows, cols = len(layout), len(layout[0])
+    dist = distance_field(layout, as_point(target))
+    x, y = as_point(origin)
+    moves = []
+    while dist[y * cols + x] > 0:
+        for direction, (dx, dy) in DIRECTIONS.items():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows and dist[ny * cols + nx] == dist[y * cols + x] - 1:
+                moves.append(direction)
+                x, y = nx, ny
+                break
+    return moves
+
+
+def precompute_maps(limite=64):
+    """Aquece o cache com o campo da recompensa inicial dos primeiros mapas de MAPS.
+
+    Só os limite primeiros, para um pacote com milhares de mapas não atrasar
+    a partida do servidor, e só até somar MAX_CACHE_CELLS células: além disso
+    os últimos campos tirariam os primeiros do cache. Os outros são
+    calculados no primeiro uso. Pode rodar numa thread à parte.
+    """
+    cells = 0
+    for map_idx in range(min(limite, len(MAPS))):
+        layout = load_map(map_idx)
+        if not layout.reward_start:
+            continue
+        cells += layout.rows * layout.cols
+        if cells > MAX_CACHE_CELLS:
+            break
+        distance_field(layout.lines, layout.reward_start)
@@ -0,0 +1,167 @@
+"""Desenha o jogo direto em arrays RGB, sem pygame, sem tela e sem SDL.
+
+Os sprites (arvore.png, player.png, recompensa.png) são lidos com PIL e
+redimensionados uma vez por tamanho de bloco, já compostos sobre a cor de
+fundo. O fundo de cada layout (paredes e grama) também é montado uma vez; um
+quadro é só a cópia do fundo mais dois blocos colados por fatiamento. Para uma
+imagem menor, desenhe com um block_size menor em vez de reduzir o quadro.
+"""
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np  # pip install numpy
+from PIL import Image as PILImage  # pip install pillow
+
+BLOCK_SIZE = 40
+BACKGROUND_COLOR = (30, 30, 30)
+OPEN_COLOR = (34, 139, 34)  # verde grama, como na janela
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@lru_cache(maxsize=None)
+def _sprite(name, block_size):
+    """Sprite redimensionado como (rgb float, alfa float em 0..1)."""
+    img = PILImage.open(os.path.join(_DIR, name)).convert("RGBA")
+    img = img.resize((block_size, block_size), PILImage.BILINEAR)
+    arr = np.asarray(img, dtype=np.float32)
+    return arr[..., :3], arr[..., 3:] / 255.0
+
+
+def _compose(name, under, block_size):
+    rgb, alpha = _sprite(name, block_size)
+    out = rgb * alpha + under.astype(np.float32) * (1.0 - alpha)
+    return np.round(out).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def tiles(block_size=BLOCK_SIZE):
+    """Blocos prontos (block_size, block_size, 3): parede, livre, jogador, recompensa e os dois juntos."""
+    solid = lambda color: np.broadcast_to(np.array(color, dtype=np.uint8), (block_size, block_size, 3))
+    open_tile = np.ascontiguousarray(solid(OPEN_COLOR))
+    player = _compose("player.png", open_tile, block_size)
+    result = {
+        "wall": _compose("arvore.png", solid(BACKGROUND_COLOR), block_size),
+        "open": open_tile,
+        "player": player,
+        "reward": _compose("recompensa.png", open_tile, block_size),
+        # A janela desenha a recompensa por cima do jogador
+        "both": _compose("recompensa.png", player, block_size),
+    }
+    for tile in result.values():
+        tile.setflags(write=False)
+    return result
+
+
+# Soma dos bytes dos fundos guardados por background()
+MAX_BACKGROUND_BYTES = 128 * 1024 * 1024
+
+_backgrounds = OrderedDict()
+_background_bytes = 0
+_backgrounds_lock = threading.Lock()
+
+
+def background(layout, block_size=BLOCK_SIZE):
+    """Fundo (rows * block_size, cols * block_size, 3) de um engine.Layout, só leitura.
+
+    Fica em cache por (layout, block_size), até somar MAX_BACKGROUND_BYTES;
+    os usados há mais tempo saem primeiro e o último pedido sempre fica.
+    """
+    global _background_bytes
+    key = (layout, block_size)
+    with _backgrounds_lock:
+        img = _backgrounds.get(key)
+        if img is not None:
+            _backgrounds.move_to_end(key)
+            return img
+    img = _draw_background(layout, block_size)
+    with _backgrounds_lock:
+        if key not in _backgrounds:
+            _backgrounds[key] = img
+            _background_bytes += img.nbytes
+        while _background_bytes > MAX_BACKGROUND_BYTES and len(_backgrounds) > 1:
+            _, old = _backgrounds.popitem(last=False)
+            _background_bytes -= old.nbytes
+    return img
+
+
+def _draw_background(layout, block_size):
+    t = tiles(block_size)
+    walls = np.frombuffer(layout.walls, dtype=np.uint8).reshape(layout.rows, layout.cols).astype(bool)
+    # (rows, bs, cols, bs, 3) -> (rows * bs, cols * bs, 3)
+    img = np.where(walls[:, None, :, None, None], t["wall"][None, :, None, :, :], t["open"][None, :, None, :, :])
+    img = img.reshape(layout.rows * block_size, layout.cols * block_size, 3)
+    img.setflags(write=False)
+    return img
+
+
+def _paste(frames, frame_idx, pos, tile, block_size):
+    """Cola tile em frames[frame_idx] na célula pos (arrays (K,) e (K, 2)), tudo de uma vez."""
+    if len(frame_idx) == 0:
+        return
+    offs = np.arange(block_size)
+    ys = pos[:, 1, None] * block_size + offs
+    xs = pos[:, 0, None] * block_size + offs
+    frames[frame_idx[:, None, None], ys[:, :, None], xs[:, None, :]] = tile
+
+
+def render(game, block_size=BLOCK_SIZE, out=None):
+    """Quadro RGB (uint8) de um engine.Game. out pode ser um array reaproveitado."""
+    bg = background(game.layout, block_size)
+    if out is None:
+        out = np.empty_like(bg)
+    out[...] = bg
+    t = tiles(block_size)
+    px, py = game.player_pos
+    bx, by = game.block_pos
+    b = block_size
+    out[py * b:(py + 1) * b, px * b:(px + 1) * b] = t["player"]
+    out[by * b:(by + 1) * b, bx * b:(bx + 1) * b] = t["both"] if (px, py) == (bx, by) else t["reward"]
+    return out
+
+
+def render_batch(layouts, layout_id, player_pos, block_pos, block_size=BLOCK_SIZE, out=None):
+    """Quadros (N, H, W, 3) de vários jogos de uma vez.
+
+    layouts é a lista de engine.Layout usados, layout_id (N,) diz o layout de
+    cada jogo e player_pos/block_pos são arrays (N, 2) em [x, y] (o mesmo
+    formato de BatchGame). Mapas menores que o maior ficam com a cor de fundo
+    no resto do quadro.
+    """
+    layout_id = np.asarray(layout_id)
+    player_pos = np.asarray(player_pos)
+    block_pos = np.asarray(block_pos)
+    height = max(layout.rows for layout in layouts) * block_size
+    width = max(layout.cols for layout in layouts) * block_size
+    bgs = np.empty((len(layouts), height, width, 3), dtype=np.uint8)
+    bgs[...] = BACKGROUND_COLOR
+    for k, layout in enumerate(layouts):
+        bg = background(layout, block_size)
+        bgs[k, :bg.shape[0], :bg.shape[1]] = bg
+    if out is None:
+        out = np.empty((len(layout_id), height, width, 3), dtype=np.uint8)
+    np.take(bgs, layout_id, axis=0, out=out)
+
+    t = tiles(block_size)
+    idx = np.arange(len(layout_id))
+    same = np.all(player_pos == block_pos, axis=1)
+    _paste(out, idx, player_pos, t["player"], block_size)
+    _paste(out, idx[~same], block_pos[~same], t["reward"], block_size)
+    _paste(out, idx[same], block_pos[same], t["both"], block_size)
+    return out
+
+
+def render_games(games, block_size=BLOCK_SIZE, out=None):
+    """render_batch para uma lista de engine.Game."""
+    index = {}
+    layout_id = [index.setdefault(game.layout, len(index)) for game in games]
+    layouts = list(index)
+    player_pos = np.array([game.player_pos for game in games], dtype=np.int64).reshape(-1, 2)
+    block_pos = np.array([game.block_pos for game in games], dtype=np.int64).reshape(-1, 2)
+    return render_batch(layouts, layout_id, player_pos, block_pos, block_size, out)
+
+
+def render_batch_game(batch, block_size=BLOCK_SIZE, out=None):
+    """render_batch para um batch_game.BatchGame."""
+    return render_batch(batch.layouts, batch.layout_id, batch.player_pos, batch.block_pos, block_size, out)
@@ -0,0 +1,68 @@
+"""Relógio do loop principal, com a lógica separada do desenho.
+
+A lógica roda em um de dois modos:
+  tick_rate=None  livre: cada volta do loop aplica tudo o que chegou, e o loop
+                  acorda assim que chega um comando novo
+  tick_rate=N     passo fixo: N passos de lógica por segundo, contados por
+                  acumulador (se o loop atrasar, os passos perdidos rodam
+                  juntos na volta seguinte, até max_ticks)
+O desenho é limitado a fps quadros por segundo, seja qual for o modo.
+"""
+import time
+
+
+class Scheduler:
+    def __init__(self, fps=10, tick_rate=None, max_ticks=8, clock=time.monotonic):
+        self.clock = clock
+        self.render_interval = 1.0 / fps if fps else None
+        self.tick_interval = 1.0 / tick_rate if tick_rate else None
+        self.max_ticks = max_ticks
+        now = clock()
+        self.next_render = now
+        self.next_tick = now
+
+    def ticks(self):
+        """Quantos passos de lógica rodar agora."""
+        if self.tick_interval is None:
+            return 1
+        now = self.clock()
+        if now < self.next_tick:
+            return 0
+        due = int((now - self.next_tick) / self.tick_interval) + 1
+        if due > self.max_ticks:
+            # Muito atrasado (ex.: janela arrastada): não tenta recuperar tudo
+            self.next_tick = now + self.tick_interval
+            return self.max_ticks
+        self.next_tick += due * self.tick_interval
+        return due
+
+    def render_due(self):
+        """True quando já é hora de desenhar o próximo quadro."""
+        if self.render_interval is None:
+            return False
+        now = self.clock()
+        if now < self.next_render:
+            return False
+        self.next_render += self.render_interval
+        if self.next_render <= now:
+            self.next_render = now + self.render_interval
+        return True
+
+    def wait(self, wakeup=None, until=None):
+        """Dorme até o próximo quadro ou passo de lógica (ou até until, se vier antes).
+
+        No modo livre, wakeup (um threading.Event, como Game.wakeup) acorda o
+        loop antes, assim que chega um comando. Quem chama limpa o evento
+        antes de aplicar os comandos, não depois, para não perder nenhum.
+        """
+        deadlines = [t for t, active in ((self.next_render, self.render_interval),
+                                         (self.next_tick, self.tick_interval)) if active]
+        if until is not None:
+            deadlines.append(until)
+        timeout = min(deadlines) - self.clock() if deadlines else None
+        if timeout is not None and timeout <= 0:
+            return
+        if wakeup is not None and self.tick_interval is None:
+            wakeup.wait(timeout)
+        elif timeout is not None:
+            time.sleep(timeout)
@@ -0,0 +1,71 @@
+"""Um jogo isolado por cliente MCP, com limite de memória.
+
+O SessionManager cria o jogo de um cliente no primeiro uso, devolve sempre o
+mesmo jogo para o mesmo id e descarta as sessões paradas há mais de
+idle_timeout segundos. Quando passa de max_sessions, a sessão usada há mais
+tempo (LRU) sai primeiro. on_evict(jogo), se dado, é chamado para cada sessão
+descartada, por um desses dois motivos ou por remove().
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionManager:
+    def __init__(self, factory, max_sessions=512, idle_timeout=30 * 60, clock=time.monotonic, on_evict=None):
+        """factory() cria o jogo de uma sessão nova (ex.: engine.Game)."""
+        self.factory = factory
+        self.on_evict = on_evict
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        # id -> [jogo, último uso]; a ordem do OrderedDict é a ordem de uso
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Jogo da sessão, criando um novo se ainda não existe (ou já expirou)."""
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = [self.factory(), now]
+                self._sessions[session_id] = entry
+                while len(self._sessions) > self.max_sessions:
+                    self._evicted(self._sessions.popitem(last=False)[1][0])
+            else:
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def remove(self, session_id):
+        """Descarta a sessão (chamando on_evict) e devolve o jogo dela, ou None."""
+        with self._lock:
+            game = self._sessions.pop(session_id, [None])[0]
+            if game is not None:
+                self._evicted(game)
+            return game
+
+    def expire(self):
+        """Descarta as sessões paradas há mais de idle_timeout segundos."""
+        with self._lock:
+            self._expire(self.clock())
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (entry_game, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            self._evicted(entry_game)
+
+    def _evicted(self, game):
+        if self.on_evict is not None:
+            self.on_evict(game)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
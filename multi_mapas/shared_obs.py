@@ -0,0 +1,159 @@
+"""Anel de observações em memória compartilhada (multiprocessing.shared_memory).
+
+Um processo que roda jogos escreve cada estado num SharedObservations e o
+processo que aprende lê direto do mesmo bloco de memória como arrays NumPy,
+sem pickle e sem cópia. Cada entrada do anel (slot) tem:
+  registro  int64 [seq, mapa, px, py, bx, by, pontuação, terminou]
+  grade     uint8 (rows, cols) com bits 1 = parede, 2 = jogador, 4 = recompensa
+  quadro    uint8 (rows * bloco, cols * bloco, 3), opcional, igual ao rasterizer
+
+O slot reescrito é o mais antigo do anel, e ele guarda onde estavam o jogador
+e a recompensa quando foi escrito; então só essas células e as novas são
+refeitas (a grade e o quadro inteiros só são copiados quando o mapa muda).
+O custo por passo não depende do tamanho do mapa.
+
+Um escritor por anel. A leitura usa seqlock: seq é ímpar enquanto o slot está
+sendo escrito, e consistent() diz se o slot continuou o mesmo depois de lido.
+
+No processo que joga:
+  ring = SharedObservations(slots=64, rows=..., cols=..., frames=True)
+  engine.Game.shared_obs = ring      # Game.step e reset escrevem sozinhos
+No processo que lê:
+  ring = SharedObservations.attach(nome)
+  slot = ring.latest(); seq, record, grid, frame = ring.read(slot)
+"""
+from multiprocessing import shared_memory
+import numpy as np  # pip install numpy
+
+MAGIC = 0x42504F42  # "BPOB"
+_HEADER_FIELDS = 8  # magic, slots, rows, cols, block_size (0 = sem quadro), escritas, 2 livres
+_RECORD_FIELDS = 8
+SEQ, MAP, PX, PY, BX, BY, SCORE, DONE = range(_RECORD_FIELDS)
+WALL_BIT, PLAYER_BIT, REWARD_BIT = 1, 2, 4
+
+
+class SharedObservations:
+    def __init__(self, slots, rows, cols, frames=False, block_size=None, name=None, _shm=None):
+        if not frames:
+            block_size = 0
+        elif block_size is None:
+            import rasterizer
+            block_size = rasterizer.BLOCK_SIZE
+        sizes = (_HEADER_FIELDS * 8, slots * _RECORD_FIELDS * 8, slots * rows * cols,
+                 slots * rows * block_size * cols * block_size * 3)
+        if _shm is None:
+            _shm = shared_memory.SharedMemory(name=name, create=True, size=sum(sizes))
+            self.owner = True
+        else:
+            self.owner = False
+        self.shm = _shm
+        self.name = _shm.name
+        self.slots, self.rows, self.cols, self.block_size = slots, rows, cols, block_size
+        buf = _shm.buf
+        offset = 0
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += sizes[0]
+        self.records = np.ndarray((slots, _RECORD_FIELDS), dtype=np.int64, buffer=buf, offset=offset)
+        offset += sizes[1]
+        self.grids = np.ndarray((slots, rows, cols), dtype=np.uint8, buffer=buf, offset=offset)
+        offset += sizes[2]
+        self.frames = None
+        if block_size:
+            self.frames = np.ndarray((slots, rows * block_size, cols * block_size, 3), dtype=np.uint8,
+                                     buffer=buf, offset=offset)
+        if self.owner:
+            self.header[:6] = (MAGIC, slots, rows, cols, block_size, 0)
+            self.records[:] = 0
+            self.records[:, MAP] = -1  # slot vazio: nenhum mapa desenhado nele
+
+    @classmethod
+    def attach(cls, name):
+        """Abre, em outro processo, um anel criado com o nome dado."""
+        shm = shared_memory.SharedMemory(name=name)
+        magic, slots, rows, cols, block_size = (int(v) for v in np.ndarray((5,), dtype=np.int64, buffer=shm.buf))
+        if magic != MAGIC:
+            shm.close()
+            raise ValueError(f"{name} não é um anel de observações do Block Picker.")
+        return cls(slots, rows, cols, frames=bool(block_size), block_size=block_size or None, _shm=shm)
+
+    @property
+    def writes(self):
+        return int(self.header[5])
+
+    def latest(self):
+        """Slot da escrita mais recente, ou None se nada foi escrito."""
+        count = self.writes
+        return (count - 1) % self.slots if count else None
+
+    def write(self, game, done=False):
+        """Escreve o estado de game (engine.Game) no próximo slot e devolve o índice dele."""
+        layout = game.layout
+        if layout.rows > self.rows or layout.cols > self.cols:
+            raise ValueError(f"O mapa {game.map_idx} é maior que o anel ({self.rows}x{self.cols}).")
+        count = self.writes
+        slot = count % self.slots
+        record = self.records[slot]
+        grid = self.grids[slot]
+        frame = self.frames[slot] if self.frames is not None else None
+        px, py = game.player_pos
+        bx, by = game.block_pos
+
+        record[SEQ] += 1  # ímpar: escrevendo
+        if record[MAP] != game.map_idx:
+            grid[:] = WALL_BIT
+            grid[:layout.rows, :layout.cols] = np.frombuffer(layout.walls, dtype=np.uint8).reshape(layout.rows, layout.cols)
+            if frame is not None:
+                self._draw_background(frame, layout)
+        else:
+            # Apaga o jogador e a recompensa de quando este slot foi escrito
+            for x, y in ((record[PX], record[PY]), (record[BX], record[BY])):
+                grid[y, x] &= WALL_BIT
+                if frame is not None:
+                    self._restore_cell(frame, layout, x, y)
+        grid[py, px] |= PLAYER_BIT
+        grid[by, bx] |= REWARD_BIT
+        if frame is not None:
+            self._draw_sprites(frame, px, py, bx, by)
+        record[MAP:] = (game.map_idx, px, py, bx, by, game.score, int(done))
+        record[SEQ] += 1  # par: pronto
+        self.header[5] = count + 1
+        return slot
+
+    def read(self, slot):
+        """(seq, registro, grade, quadro) do slot, como views da memória compartilhada.
+
+        Confira consistent(slot, seq) depois de usar os dados (ou de copiá-los):
+        se der False, o escritor passou por cima do slot enquanto ele era lido.
+        """
+        seq = int(self.records[slot, SEQ])
+        frame = self.frames[slot] if self.frames is not None else None
+        return seq, self.records[slot], self.grids[slot], frame
+
+    def consistent(self, slot, seq):
+        return seq % 2 == 0 and int(self.records[slot, SEQ]) == seq
+
+    def _draw_background(self, frame, layout):
+        import rasterizer
+        bg = rasterizer.background(layout, self.block_size)
+        frame[...] = rasterizer.BACKGROUND_COLOR
+        frame[:bg.shape[0], :bg.shape[1]] = bg
+
+    def _restore_cell(self, frame, layout, x, y):
+        import rasterizer
+        b = self.block_size
+        bg = rasterizer.background(layout, b)
+        frame[y * b:(y + 1) * b, x * b:(x + 1) * b] = bg[y * b:(y + 1) * b, x * b:(x + 1) * b]
+
+    def _draw_sprites(self, frame, px, py, bx, by):
+        import rasterizer
+        t = rasterizer.tiles(self.block_size)
+        b = self.block_size
+        frame[py * b:(py + 1) * b, px * b:(px + 1) * b] = t["player"]
+        frame[by * b:(by + 1) * b, bx * b:(bx + 1) * b] = t["both"] if (px, py) == (bx, by) else t["reward"]
+
+    def close(self):
+        """Solta as views e fecha o bloco; quem criou o anel também o apaga."""
+        self.header = self.records = self.grids = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,5 +1,7 @@
 import pygame
 import random
+import threading
+from collections import deque
 from mcp.server.fastmcp import FastMCP
 
 # Game settings
@@ -18,6 +20,9 @@ DIRECTIONS = {
 # MCP server
 mcp = FastMCP("Block Picker Game")
 
+# O servidor MCP roda em outra thread: todo acesso ao jogo passa por este lock
+game_lock = threading.RLock()
+
 class Game:
     def __init__(self):
         rows = HEIGHT // BLOCK_SIZE
@@ -29,7 +34,7 @@ class Game:
         self.player_pos = [px * BLOCK_SIZE, py * BLOCK_SIZE]
         self.block_pos = self.random_block()
         self.score = 0
-        self.move_command = None
+        self.commands = deque()  # movimentos do MCP, na ordem em que chegaram
 
     def random_block(self):
         rows = HEIGHT // BLOCK_SIZE
@@ -60,7 +65,8 @@ class Game:
             self.block_pos = self.random_block()
 
     def set_move(self, direction):
-        self.move_command = direction
+        with game_lock:
+            self.commands.append(direction)
 
     def get_score(self):
         return self.score
@@ -99,13 +105,15 @@ def mover(direcao: str) -> str:
 @mcp.tool()
 def pontuacao() -> str:
     """Retorna a pontuação atual do jogador."""
-    return f"Pontuação: {game.get_score()}"
+    with game_lock:
+        return f"Pontuação: {game.get_score()}"
 
 
 @mcp.tool()
 def mapa() -> str:
     """Retorna o desenho do mapa atual (P=player, R=recompensa, espaço=livre)."""
-    return game.get_map()
+    with game_lock:
+        return game.get_map()
 
 
 def main():
@@ -116,48 +124,49 @@ def main():
     running = True
 
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    game.move_player('up')
-                elif event.key == pygame.K_DOWN:
-                    game.move_player('down')
-                elif event.key == pygame.K_LEFT:
-                    game.move_player('left')
-                elif event.key == pygame.K_RIGHT:
-                    game.move_player('right')
-
-        # Move by MCP command
-        if game.move_command:
-            game.move_player(game.move_command)
-            game.move_command = None
-
-        game.update()
-
-        screen.fill((30, 30, 30))
-
-        # Desenha cerca (marrom) apenas nas laterais
-        rows = HEIGHT // BLOCK_SIZE
-        cols = WIDTH // BLOCK_SIZE
-        brown = (139, 69, 19)
-        # Extremidades
-        for y in range(rows):
-            pygame.draw.rect(screen, brown, (0, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-            pygame.draw.rect(screen, brown, ((cols-1) * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-        for x in range(cols):
-            pygame.draw.rect(screen, brown, (x * BLOCK_SIZE, 0, BLOCK_SIZE, BLOCK_SIZE))
-            pygame.draw.rect(screen, brown, (x * BLOCK_SIZE, (rows-1) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-
-        # Player e recompensa
-        pygame.draw.rect(screen, (0, 255, 0), (*game.player_pos, BLOCK_SIZE, BLOCK_SIZE))
-        pygame.draw.rect(screen, (255, 0, 0), (*game.block_pos, BLOCK_SIZE, BLOCK_SIZE))
-
-        # Escreve o score na tela
-        font = pygame.font.SysFont(None, 36)
-        score_text = font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
-        screen.blit(score_text, (10, 10))
+        with game_lock:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_UP:
+                        game.move_player('up')
+                    elif event.key == pygame.K_DOWN:
+                        game.move_player('down')
+                    elif event.key == pygame.K_LEFT:
+                        game.move_player('left')
+                    elif event.key == pygame.K_RIGHT:
+                        game.move_player('right')
+
+            # Move by MCP command: todos os que chegaram desde o último quadro
+            while game.commands:
+                game.move_player(game.commands.popleft())
+                game.update()
+
+            game.update()
+
+            screen.fill((30, 30, 30))
+
+            # Desenha cerca (marrom) apenas nas laterais
+            rows = HEIGHT // BLOCK_SIZE
+            cols = WIDTH // BLOCK_SIZE
+            brown = (139, 69, 19)
+            # Extremidades
+            for y in range(rows):
+                pygame.draw.rect(screen, brown, (0, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+                pygame.draw.rect(screen, brown, ((cols-1) * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+            for x in range(cols):
+                pygame.draw.rect(screen, brown, (x * BLOCK_SIZE, 0, BLOCK_SIZE, BLOCK_SIZE))
+                pygame.draw.rect(screen, brown, (x * BLOCK_SIZE, (rows-1) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+
+            # Player e recompensa
+            pygame.draw.rect(screen, (0, 255, 0), (*game.player_pos, BLOCK_SIZE, BLOCK_SIZE))
+            pygame.draw.rect(screen, (255, 0, 0), (*game.block_pos, BLOCK_SIZE, BLOCK_SIZE))
+
+            # Escreve o score na tela
+            font = pygame.font.SysFont(None, 36)
+            score_text = font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
+            screen.blit(score_text, (10, 10))
 
         pygame.display.flip()
         clock.tick(FPS)
@@ -165,7 +174,6 @@ def main():
     pygame.quit()
 
 if __name__ == "__main__":
-    import threading
     # Run MCP server in a separate thread
     threading.Thread(target=lambda: mcp.run(transport="sse"), daemon=True).start()
     main()
@@ -2,6 +2,8 @@
 
 import pygame # pip install pygame
 import random
+import threading
+from collections import deque
 from mcp.server.fastmcp import FastMCP # pip install mcp
 
 # Hand-drawn map layout (use '#' for wall, 'O' for open space)
@@ -36,6 +38,9 @@ DIRECTIONS = {
 # MCP server
 mcp = FastMCP("Block Picker Game")
 
+# O servidor MCP roda em outra thread: todo acesso ao jogo passa por este lock
+game_lock = threading.RLock()
+
 
 def find_positions_and_clean_map():
     player_pos = None
@@ -71,7 +76,7 @@ class Game:
         else:
             self.block_pos = self.random_block()
         self.score = 0
-        self.move_command = None
+        self.commands = deque()  # movimentos do MCP, na ordem em que chegaram
 
     def find_first_open(self):
         for y, row in enumerate(self.map_layout):
@@ -102,7 +107,8 @@ class Game:
             self.block_pos = self.random_block()
 
     def set_move(self, direction):
-        self.move_command = direction
+        with game_lock:
+            self.commands.append(direction)
         print("Moveu ", direction)
 
     def get_score(self):
@@ -134,13 +140,15 @@ def mover(direcao: str) -> str:
 @mcp.tool()
 def pontuacao() -> str:
     """Retorna a pontuação atual do jogador."""
-    return f"Pontuação: {game.get_score()}"
+    with game_lock:
+        return f"Pontuação: {game.get_score()}"
 
 
 @mcp.tool()
 def pedir_mapa() -> str:
     """Retorna o desenho do mapa atual (P=player, R=recompensa, O=livre, #=bloqueado)."""
-    return game.get_map()
+    with game_lock:
+        return game.get_map()
 
 
 def main():
@@ -152,47 +160,48 @@ def main():
     brown = (139, 69, 19)
     open_color = (50, 50, 50)
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    game.move_player('up')
-                elif event.key == pygame.K_DOWN:
-                    game.move_player('down')
-                elif event.key == pygame.K_LEFT:
-                    game.move_player('left')
-                elif event.key == pygame.K_RIGHT:
-                    game.move_player('right')
-
-        # Move by MCP command
-        if game.move_command:
-            game.move_player(game.move_command)
-            game.move_command = None
-
-        game.update()
-
-        screen.fill((30, 30, 30))
-
-        # Draw map from MAP_LAYOUT
-        for y, row in enumerate(MAP_LAYOUT):
-            for x, cell in enumerate(row):
-                rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                if cell == '#':
-                    pygame.draw.rect(screen, brown, rect)
-                else:
-                    pygame.draw.rect(screen, open_color, rect)
-
-        # Player and reward
-        px, py = game.player_pos
-        bx, by = game.block_pos
-        pygame.draw.rect(screen, (0, 255, 0), (px * BLOCK_SIZE, py * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-        pygame.draw.rect(screen, (255, 0, 0), (bx * BLOCK_SIZE, by * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-
-        # Draw score
-        font = pygame.font.SysFont(None, 36)
-        score_text = font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
-        screen.blit(score_text, (10, 10))
+        with game_lock:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_UP:
+                        game.move_player('up')
+                    elif event.key == pygame.K_DOWN:
+                        game.move_player('down')
+                    elif event.key == pygame.K_LEFT:
+                        game.move_player('left')
+                    elif event.key == pygame.K_RIGHT:
+                        game.move_player('right')
+
+            # Move by MCP command: todos os que chegaram desde o último quadro
+            while game.commands:
+                game.move_player(game.commands.popleft())
+                game.update()
+
+            game.update()
+
+            screen.fill((30, 30, 30))
+
+            # Draw map from MAP_LAYOUT
+            for y, row in enumerate(MAP_LAYOUT):
+                for x, cell in enumerate(row):
+                    rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                    if cell == '#':
+                        pygame.draw.rect(screen, brown, rect)
+                    else:
+                        pygame.draw.rect(screen, open_color, rect)
+
+            # Player and reward
+            px, py = game.player_pos
+            bx, by = game.block_pos
+            pygame.draw.rect(screen, (0, 255, 0), (px * BLOCK_SIZE, py * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+            pygame.draw.rect(screen, (255, 0, 0), (bx * BLOCK_SIZE, by * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+
+            # Draw score
+            font = pygame.font.SysFont(None, 36)
+            score_text = font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
+            screen.blit(score_text, (10, 10))
 
         pygame.display.flip()
         clock.tick(FPS)
@@ -200,7 +209,6 @@ def main():
     pygame.quit()
 
 if __name__ == "__main__":
-    import threading
     # Run MCP server in a separate thread
     threading.Thread(target=lambda: mcp.run(transport="sse"), daemon=True).start()
     main()
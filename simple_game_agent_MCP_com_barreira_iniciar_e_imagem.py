@@ -3,6 +3,8 @@ from PIL import ImageDraw  # pip install pillow
 import io
 import pygame #pip install pygame
 import random
+import threading
+from collections import deque
 from mcp.server.fastmcp import FastMCP # pip install mcp
 import base64
 
@@ -40,6 +42,9 @@ DIRECTIONS = {
 # MCP server
 mcp = FastMCP("Block Picker Game")
 
+# O servidor MCP roda em outra thread: todo acesso ao jogo passa por este lock
+game_lock = threading.RLock()
+
 
 def find_positions_and_clean_map():
     player_pos = None
@@ -77,7 +82,7 @@ class Game:
         else:
             self.block_pos = self.random_block()
         self.score = 0
-        self.move_command = None
+        self.commands = deque()  # movimentos do MCP, na ordem em que chegaram
         self.started = False  # se está jogando
         self.show_reward_screen = False  # se mostra tela de recompensa
 
@@ -118,7 +123,8 @@ class Game:
             self.started = False
 
     def set_move(self, direction):
-        self.move_command = direction
+        with game_lock:
+            self.commands.append(direction)
         print("Moveu ", direction)
 
     def get_score(self):
@@ -150,48 +156,52 @@ def mover(direcao: str) -> str:
 @mcp.tool()
 def pontuacao() -> str:
     """Retorna a pontuação atual do jogador."""
-    return f"Pontuação: {game.get_score()}"
+    with game_lock:
+        return f"Pontuação: {game.get_score()}"
 
 
 @mcp.tool()
 def pedir_mapa() -> str:
     """Retorna o desenho do mapa atual (P=player, R=recompensa, O=livre, #=bloqueado)."""
-    if not game.started and not game.show_reward_screen:
-        return "O jogo ainda não foi iniciado. Use o botão ou a ferramenta 'iniciar_jogo' para começar."
-    if game.show_reward_screen:
-        return "Parabéns! Você pegou a recompensa. Clique em 'Iniciar' para jogar novamente."
-    return game.get_map()
+    with game_lock:
+        if not game.started and not game.show_reward_screen:
+            return "O jogo ainda não foi iniciado. Use o botão ou a ferramenta 'iniciar_jogo' para começar."
+        if game.show_reward_screen:
+            return "Parabéns! Você pegou a recompensa. Clique em 'Iniciar' para jogar novamente."
+        return game.get_map()
 
 
 @mcp.tool()
 def ver_imagem() -> str:
     """Captura a tela atual do jogo, incluindo tela inicial, recompensa ou jogo."""
     import pygame.surfarray
-    # A tela do pygame deve estar criada e visível
-    screen = pygame.display.get_surface()
-    if screen is None:
-        return "Tela não disponível."
-    # Captura a tela como array
-    arr = pygame.surfarray.array3d(screen)
-    # Transforma para PIL (precisa transpor e inverter eixo)
-    img = PILImage.fromarray(arr.swapaxes(0, 1))
-    buffer = io.BytesIO()
-    img.save(buffer, format="JPEG")
-    img_bytes = buffer.getvalue()
-    img_base64 = base64.b64encode(img_bytes).decode("utf-8")
-    return img_base64
+    with game_lock:
+        # A tela do pygame deve estar criada e visível
+        screen = pygame.display.get_surface()
+        if screen is None:
+            return "Tela não disponível."
+        # Captura a tela como array
+        arr = pygame.surfarray.array3d(screen)
+        # Transforma para PIL (precisa transpor e inverter eixo)
+        img = PILImage.fromarray(arr.swapaxes(0, 1))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+        img_bytes = buffer.getvalue()
+        img_base64 = base64.b64encode(img_bytes).decode("utf-8")
+        return img_base64
 
 
 @mcp.tool()
 def iniciar_jogo() -> str:
     """Inicia ou reinicia o jogo (igual ao botão Iniciar da tela). Só funciona na tela inicial ou de recompensa."""
-    if game.started:
-        return "O jogo já está em andamento. Só é possível iniciar na tela inicial ou após pegar a recompensa."
-    if not game.started or game.show_reward_screen:
-        game.reset()
-        game.start()
-        return "Jogo iniciado!"
-    return "Só é possível iniciar na tela inicial ou após pegar a recompensa."
+    with game_lock:
+        if game.started:
+            return "O jogo já está em andamento. Só é possível iniciar na tela inicial ou após pegar a recompensa."
+        if not game.started or game.show_reward_screen:
+            game.reset()
+            game.start()
+            return "Jogo iniciado!"
+        return "Só é possível iniciar na tela inicial ou após pegar a recompensa."
 
 
 def main():
@@ -207,73 +217,74 @@ def main():
 
 
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        with game_lock:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif not game.started:
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        if button_rect.collidepoint(event.pos):
+                            game.reset()
+                            game.start()
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_UP:
+                        game.move_player('up')
+                    elif event.key == pygame.K_DOWN:
+                        game.move_player('down')
+                    elif event.key == pygame.K_LEFT:
+                        game.move_player('left')
+                    elif event.key == pygame.K_RIGHT:
+                        game.move_player('right')
+
+            screen.fill((30, 30, 30))
+
+            if game.show_reward_screen:
+                # Tela de recompensa
+                msg_font = pygame.font.SysFont(None, 48)
+                msg = msg_font.render("Você pegou a recompensa!", True, (255, 255, 255))
+                msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
+                screen.blit(msg, msg_rect)
+                # Botão iniciar
+                pygame.draw.rect(screen, (70, 130, 180), button_rect)
+                text = font.render("Iniciar", True, (255, 255, 255))
+                text_rect = text.get_rect(center=button_rect.center)
+                screen.blit(text, text_rect)
             elif not game.started:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if button_rect.collidepoint(event.pos):
-                        game.reset()
-                        game.start()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    game.move_player('up')
-                elif event.key == pygame.K_DOWN:
-                    game.move_player('down')
-                elif event.key == pygame.K_LEFT:
-                    game.move_player('left')
-                elif event.key == pygame.K_RIGHT:
-                    game.move_player('right')
-
-        screen.fill((30, 30, 30))
-
-        if game.show_reward_screen:
-            # Tela de recompensa
-            msg_font = pygame.font.SysFont(None, 48)
-            msg = msg_font.render("Você pegou a recompensa!", True, (255, 255, 255))
-            msg_rect = msg.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
-            screen.blit(msg, msg_rect)
-            # Botão iniciar
-            pygame.draw.rect(screen, (70, 130, 180), button_rect)
-            text = font.render("Iniciar", True, (255, 255, 255))
-            text_rect = text.get_rect(center=button_rect.center)
-            screen.blit(text, text_rect)
-        elif not game.started:
-            # Tela inicial com botão
-            pygame.draw.rect(screen, (70, 130, 180), button_rect)
-            text = font.render("Iniciar", True, (255, 255, 255))
-            text_rect = text.get_rect(center=button_rect.center)
-            screen.blit(text, text_rect)
-            title = font.render("Block Picker Game", True, (255, 255, 255))
-            title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
-            screen.blit(title, title_rect)
-        else:
-            # Move by MCP command
-            if game.move_command:
-                game.move_player(game.move_command)
-                game.move_command = None
-
-            game.update()
-
-            # Draw map from MAP_LAYOUT
-            for y, row in enumerate(MAP_LAYOUT):
-                for x, cell in enumerate(row):
-                    rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                    if cell == '#':
-                        pygame.draw.rect(screen, brown, rect)
-                    else:
-                        pygame.draw.rect(screen, open_color, rect)
-
-            # Player and reward
-            px, py = game.player_pos
-            bx, by = game.block_pos
-            pygame.draw.rect(screen, (0, 255, 0), (px * BLOCK_SIZE, py * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-            pygame.draw.rect(screen, (255, 0, 0), (bx * BLOCK_SIZE, by * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-
-            # Draw score
-            score_font = pygame.font.SysFont(None, 36)
-            score_text = score_font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
-            screen.blit(score_text, (10, 10))
+                # Tela inicial com botão
+                pygame.draw.rect(screen, (70, 130, 180), button_rect)
+                text = font.render("Iniciar", True, (255, 255, 255))
+                text_rect = text.get_rect(center=button_rect.center)
+                screen.blit(text, text_rect)
+                title = font.render("Block Picker Game", True, (255, 255, 255))
+                title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 100))
+                screen.blit(title, title_rect)
+            else:
+                # Move by MCP command: todos os que chegaram desde o último quadro
+                while game.commands and game.started:
+                    game.move_player(game.commands.popleft())
+                    game.update()
+
+                game.update()
+
+                # Draw map from MAP_LAYOUT
+                for y, row in enumerate(MAP_LAYOUT):
+                    for x, cell in enumerate(row):
+                        rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                        if cell == '#':
+                            pygame.draw.rect(screen, brown, rect)
+                        else:
+                            pygame.draw.rect(screen, open_color, rect)
+
+                # Player and reward
+                px, py = game.player_pos
+                bx, by = game.block_pos
+                pygame.draw.rect(screen, (0, 255, 0), (px * BLOCK_SIZE, py * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+                pygame.draw.rect(screen, (255, 0, 0), (bx * BLOCK_SIZE, by * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+
+                # Draw score
+                score_font = pygame.font.SysFont(None, 36)
+                score_text = score_font.render(f'Score: {game.get_score()}', True, (255, 255, 255))
+                screen.blit(score_text, (10, 10))
 
         pygame.display.flip()
         clock.tick(FPS)
@@ -281,7 +292,6 @@ def main():
     pygame.quit()
 
 if __name__ == "__main__":
-    import threading
     # Run MCP server in a separate thread
     threading.Thread(target=lambda: mcp.run(transport="sse"), daemon=True).start()
     main()